@@ -0,0 +1,108 @@
+"""
+Deterministic synthetic corpus shaped like EventRegistry events after
+`extract_and_prepare_event_data`, for seeding a local search backend.
+
+Concept popularity is Zipf-like and every event gets 3-8 concepts, a
+category or two and a geolocated place, so feed, search and aggregation
+costs look like production rather than like a toy index.
+"""
+import random
+import datetime
+
+TOPICS = [
+    "Climate change", "Global warming", "Wildfire", "Drought", "Flood",
+    "Heat wave", "Hurricane", "Sea level rise", "Carbon dioxide",
+    "Renewable energy", "Solar power", "Wind power", "Electric vehicle",
+    "Deforestation", "Biodiversity", "Coral reef", "Glacier", "Arctic",
+    "Paris Agreement", "Greenhouse gas", "Methane", "Coal", "Fossil fuel",
+    "Air pollution", "Heat pump", "Carbon tax", "Emissions trading",
+    "El Niño", "Monsoon", "Permafrost", "Ocean acidification", "Climate finance",
+]
+PLACES = [
+    ("United States", 39.8, -98.6), ("India", 20.6, 79.0), ("China", 35.9, 104.2),
+    ("Brazil", -14.2, -51.9), ("Australia", -25.3, 133.8), ("Germany", 51.2, 10.5),
+    ("Kenya", -0.02, 37.9), ("Canada", 56.1, -106.3), ("Indonesia", -0.8, 113.9),
+    ("United Kingdom", 55.4, -3.4), ("Pakistan", 30.4, 69.3), ("Mexico", 23.6, -102.6),
+    ("Nigeria", 9.1, 8.7), ("Japan", 36.2, 138.3), ("Bangladesh", 23.7, 90.4),
+    ("South Africa", -30.6, 22.9), ("Greenland", 71.7, -42.6), ("Spain", 40.5, -3.7),
+]
+ORGS = [
+    "United Nations", "IPCC", "World Bank", "European Union", "NASA", "NOAA",
+    "Greenpeace", "International Energy Agency", "World Meteorological Organization",
+]
+CATEGORIES = [
+    ("dmoz/Science/Environment", "dmoz/Science/Environment"),
+    ("dmoz/Science/Earth_Sciences/Climate", "dmoz/Science/Earth_Sciences/Climate"),
+    ("news/Environment", "news/Environment"),
+    ("news/Business", "news/Business"),
+    ("news/Politics", "news/Politics"),
+    ("news/Science", "news/Science"),
+]
+VERBS = ["threatens", "hits", "reshapes", "accelerates", "slows", "spurs", "worsens", "drives"]
+FILLER = [
+    "officials said", "according to new data", "scientists warned",
+    "as temperatures climb", "in a report released on", "amid record demand",
+    "after weeks of", "while communities prepare for", "despite pledges on",
+]
+
+
+def _wiki(label):
+    return "http://en.wikipedia.org/wiki/" + label.replace(" ", "_")
+
+
+def _concept_pool():
+    pool = [{"uri": _wiki(t), "type": "wiki", "label": {"eng": t}} for t in TOPICS]
+    pool += [{"uri": _wiki(o), "type": "org", "label": {"eng": o}} for o in ORGS]
+    for name, lat, lon in PLACES:
+        pool.append({
+            "uri": _wiki(name), "type": "loc", "label": {"eng": name},
+            "location": {"label": {"eng": name}, "lat": lat, "long": lon},
+        })
+    return pool
+
+
+def generate(n, seed=7, now=None):
+    """Yield `n` events; same `seed` -> same corpus."""
+    rng = random.Random(seed)
+    now = now or datetime.datetime.utcnow()
+    pool = _concept_pool()
+    weights = [1 / (rank + 1) for rank in range(len(pool))]  # Zipf-ish
+    rng.shuffle(weights)
+
+    for i in range(n):
+        picked = {c["uri"]: c for c in rng.choices(pool, weights, k=rng.randint(3, 8))}
+        concepts = [dict(c, score=rng.randint(51, 100)) for c in picked.values()]
+        topic = next((c["label"]["eng"] for c in concepts if c["type"] == "wiki"),
+                     rng.choice(TOPICS))
+        name, lat, lon = rng.choice(PLACES)
+        other = rng.choice(TOPICS)
+        title = f"{topic} {rng.choice(VERBS)} {other.lower()} in {name}"
+        summary = " ".join(
+            f"{rng.choice(TOPICS)} {rng.choice(VERBS)} {rng.choice(TOPICS).lower()} "
+            f"{rng.choice(FILLER)} {name}." for _ in range(rng.randint(3, 7)))
+        event_date = (now - datetime.timedelta(days=rng.uniform(0, 30))).date()
+
+        yield {
+            "uri": f"bench-{seed}-{i}",
+            "title": {"eng": title},
+            "summary": {"eng": summary},
+            "images": [f"https://example.org/img/{seed}/{i}.jpg"],
+            "eventDate": event_date.isoformat(),
+            "sentiment": round(rng.uniform(-1, 1), 3),
+            "socialScore": round(rng.lognormvariate(3, 1.5), 2),
+            "wgt": rng.randint(1, 500),
+            "totalArticleCount": rng.randint(5, 999),
+            "articleCounts": {"eng": rng.randint(5, 500)},
+            "categories": [
+                {"uri": uri, "label": label, "wgt": rng.randint(20, 100)}
+                for uri, label in rng.sample(CATEGORIES, rng.randint(1, 2))
+            ],
+            "concepts": concepts,
+            "location": {
+                "label": {"eng": name},
+                "lat": lat + rng.uniform(-3, 3),
+                "long": lon + rng.uniform(-3, 3),
+                "country": {"label": {"eng": name}, "lat": lat, "long": lon},
+            },
+            "infoArticle": {"eng": {"url": f"https://example.org/news/{seed}/{i}"}},
+        }
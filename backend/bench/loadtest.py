@@ -0,0 +1,348 @@
+"""
+Reproducible load test for one API worker.
+
+Seeds the local search backend, starts a worker (Flask, ASGI, or the Lambda
+handler behind a local adapter), replays a mix of `/articles` cursor paging and
+`/search` queries taken from a query log, and writes throughput, latency
+percentiles and error rates as JSON.
+
+    cd backend
+    # one run: 16 concurrent clients for 30 s against Flask, 5000 synthetic events
+    python3 bench/loadtest.py --target flask --seed 5000 --concurrency 16 --duration 30
+
+    # "how many req/s before p99 passes 300 ms?"
+    python3 bench/loadtest.py --target lambda --sweep 1,2,4,8,16,32 --slo-ms 300 \
+        --queries access.log --out results.json
+
+`--queries` accepts a plain list (one query per line) or raw access logs:
+any line containing `query=...` contributes that query, so popular queries
+are replayed in proportion to how often they were logged.
+"""
+import os
+import re
+import sys
+import json
+import math
+import gzip
+import time
+import random
+import socket
+import argparse
+import platform
+import threading
+import subprocess
+import http.client
+from urllib.parse import quote, unquote_plus, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+REPO = os.path.dirname(os.path.dirname(HERE))
+
+DEFAULT_QUERIES = os.path.join(HERE, "queries.txt")
+_QUERY_RE = re.compile(r"[?&]query=([^&\s\"']+)")
+
+
+# ---------- workload ---------- #
+
+def report_path(path):
+    """`path` relative to the repo, so results don't record the local checkout."""
+    path = os.path.abspath(path)
+    if os.path.commonpath([path, REPO]) == REPO:
+        return os.path.relpath(path, REPO)
+    return os.path.basename(path)
+
+
+def load_queries(path):
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            m = _QUERY_RE.search(line)
+            if m:
+                queries.append(unquote_plus(m.group(1)))
+            elif "/" not in line:
+                queries.append(line)
+    if not queries:
+        raise SystemExit(f"no queries found in {path}")
+    return queries
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"articles", "search"}
+    if unknown:
+        raise SystemExit(f"unknown mix entries: {sorted(unknown)}")
+    return mix
+
+
+# ---------- seeding ---------- #
+
+def seed_backend(args):
+    """Recreate the events index from synthetic events or from snapshots."""
+    from opensearchpy.helpers import bulk
+    from flare_backend.opensearch_client import es
+    from flare_backend.routes import handle_create_index, handle_delete_index
+    from flare_backend.concepts import split_concepts, concept_actions
+
+    if args.snapshots:
+        from flare_backend.restore import restore_snapshots, parse_date
+        handle_delete_index()
+        start = parse_date(args.snap_start)
+        end = parse_date(args.snap_end) if args.snap_end else start
+        return restore_snapshots(args.snapshots, start, end)
+
+    import corpus
+    handle_delete_index()
+    handle_create_index()
+    actions, concepts = [], {}
+    for ev in corpus.generate(args.seed, seed=args.corpus_seed):
+        doc, ev_concepts = split_concepts(ev)
+        concepts.update(ev_concepts)
+        actions.append({"_index": "events", "_id": ev["uri"], "_source": doc})
+    indexed, _ = bulk(es, [*concept_actions(concepts), *actions], chunk_size=500, refresh=True)
+    return {"indexed": indexed - len(concepts), "concepts": len(concepts),
+            "corpus_seed": args.corpus_seed}
+
+
+# ---------- server ---------- #
+
+def _wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"server on {host}:{port} did not come up")
+
+
+def start_server(target, port):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "serve.py"), target, "--port", str(port)],
+        env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    _wait_for_port("127.0.0.1", port)
+    return proc
+
+
+# ---------- client ---------- #
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {"articles": [], "search": []}
+        self.errors = {"articles": 0, "search": 0}
+        self.status = {}
+
+    def add(self, endpoint, status, seconds):
+        with self.lock:
+            self.status[status] = self.status.get(status, 0) + 1
+            if 200 <= status < 300:
+                self.latencies[endpoint].append(seconds)
+            else:
+                self.errors[endpoint] += 1
+
+
+def _get(base, path):
+    """Returns (status, decoded body or None, seconds)."""
+    url = urlsplit(base)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    t0 = time.perf_counter()
+    try:
+        conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+        resp = conn.getresponse()
+        raw = resp.read()
+        elapsed = time.perf_counter() - t0
+        if resp.getheader("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        return resp.status, raw, elapsed
+    except (OSError, http.client.HTTPException):
+        return 599, None, time.perf_counter() - t0
+    finally:
+        conn.close()
+
+
+def virtual_user(base, rng, mix, queries, args, rec, deadline, record_from):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        if rng.choices(names, weights)[0] == "search":
+            status, _, dt = _get(base, "/search?query=" + quote(rng.choice(queries)))
+            if time.perf_counter() >= record_from:
+                rec.add("search", status, dt)
+            continue
+
+        # one client loading the feed: first page, then follow cursors
+        after = None
+        for _ in range(args.pages):
+            path = f"/articles?limit={args.page_size}"
+            if args.format != "json":
+                path += "&format=" + args.format
+            if after:
+                path += "&after=" + quote(after)
+            status, raw, dt = _get(base, path)
+            if time.perf_counter() >= record_from:
+                rec.add("articles", status, dt)
+            if status != 200 or time.perf_counter() >= deadline:
+                break
+            after = json.loads(raw).get("next")
+            if not after:
+                break
+
+
+def _pct(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # nearest-rank percentile
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100 * len(sorted_values))))
+    return round(sorted_values[rank - 1] * 1000, 2)
+
+
+def summarize(rec, elapsed):
+    per_endpoint, total_ok, total_err = {}, 0, 0
+    all_lat = []
+    for name, lat in rec.latencies.items():
+        lat.sort()
+        all_lat.extend(lat)
+        n, err = len(lat), rec.errors[name]
+        total_ok += n
+        total_err += err
+        per_endpoint[name] = {
+            "requests": n + err,
+            "errors": err,
+            "error_rate": round(err / (n + err), 4) if n + err else 0.0,
+            "rps": round(n / elapsed, 2),
+            **{f"p{p}_ms": _pct(lat, p) for p in (50, 90, 95, 99)},
+            "max_ms": round(lat[-1] * 1000, 2) if lat else None,
+        }
+    all_lat.sort()
+    total = total_ok + total_err
+    return {
+        "requests": total,
+        "errors": total_err,
+        "error_rate": round(total_err / total, 4) if total else 0.0,
+        "rps": round(total_ok / elapsed, 2),
+        **{f"p{p}_ms": _pct(all_lat, p) for p in (50, 90, 95, 99)},
+        "status_codes": {str(k): v for k, v in sorted(rec.status.items())},
+        "endpoints": per_endpoint,
+    }
+
+
+def run_step(base, concurrency, mix, queries, args):
+    rec = Recorder()
+    start = time.perf_counter()
+    record_from = start + args.warmup
+    deadline = record_from + args.duration
+    threads = [
+        threading.Thread(target=virtual_user, daemon=True, args=(
+            base, random.Random(args.workload_seed + i), mix, queries,
+            args, rec, deadline, record_from))
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = max(1e-9, time.perf_counter() - record_from)
+    return dict(concurrency=concurrency, **summarize(rec, elapsed))
+
+
+# ---------- main ---------- #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load-test one API worker against a seeded local search backend.")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--target", choices=["flask", "asgi", "lambda"], default="flask",
+                       help="worker to start (default: flask)")
+    where.add_argument("--url", help="hit an already running server instead")
+    parser.add_argument("--port", type=int, default=5055)
+
+    seed = parser.add_argument_group("seeding (skipped unless given)")
+    seed.add_argument("--seed", type=int, default=0, help="index N synthetic events")
+    seed.add_argument("--corpus-seed", type=int, default=7)
+    seed.add_argument("--snapshots", help="restore from snapshots instead (s3:// or dir)")
+    seed.add_argument("--snap-start")
+    seed.add_argument("--snap-end")
+
+    load = parser.add_argument_group("workload")
+    load.add_argument("--queries", default=DEFAULT_QUERIES)
+    load.add_argument("--mix", default="articles=0.6,search=0.4")
+    load.add_argument("--pages", type=int, default=5, help="cursor pages per feed load")
+    load.add_argument("--page-size", type=int, default=200)
+    load.add_argument("--format", choices=["json", "columnar"], default="json",
+                      help="/articles response format")
+    load.add_argument("--concurrency", type=int, default=8)
+    load.add_argument("--sweep", help="comma-separated concurrency steps")
+    load.add_argument("--duration", type=float, default=20, help="seconds per step")
+    load.add_argument("--warmup", type=float, default=3)
+    load.add_argument("--workload-seed", type=int, default=1)
+    load.add_argument("--slo-ms", type=float, default=300, help="p99 objective")
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.snapshots and not args.snap_start:
+        parser.error("--snapshots needs --snap-start")
+
+    queries = load_queries(args.queries)
+    mix = parse_mix(args.mix)
+    seeded = seed_backend(args) if (args.seed or args.snapshots) else None
+
+    proc = None
+    base = args.url
+    if not base:
+        proc = start_server(args.target, args.port)
+        base = f"http://127.0.0.1:{args.port}"
+
+    steps = [int(c) for c in args.sweep.split(",")] if args.sweep else [args.concurrency]
+    try:
+        results = []
+        for c in steps:
+            results.append(run_step(base, c, mix, queries, args))
+            print(f"[loadtest] c={c} rps={results[-1]['rps']} "
+                  f"p99={results[-1]['p99_ms']}ms errors={results[-1]['errors']}",
+                  file=sys.stderr)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    from flare_backend.config import Settings
+
+    within = [r for r in results if r["p99_ms"] is not None and r["p99_ms"] <= args.slo_ms]
+    report = {
+        "config": {
+            "target": args.url or args.target,
+            # the server started here inherits our environment; --url is opaque
+            "search_backend": None if args.url else Settings.SEARCH_BACKEND,
+            "mix": mix,
+            "pages": args.pages,
+            "page_size": args.page_size,
+            "format": args.format,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "queries": {"file": report_path(args.queries), "count": len(queries), "distinct": len(set(queries))},
+            "python": platform.python_version(),
+        },
+        "seed": seeded,
+        "steps": results,
+        "slo": {
+            "p99_ms": args.slo_ms,
+            "max_rps_within_slo": max((r["rps"] for r in within), default=None),
+        },
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Serve one API worker for load tests:
+
+    python3 backend/bench/serve.py flask  --port 5000   # threaded WSGI server
+    python3 backend/bench/serve.py asgi   --port 5001   # uvicorn, one worker
+    python3 backend/bench/serve.py lambda --port 5002   # handler_api via a local adapter
+
+The lambda adapter turns each HTTP request into an API Gateway (HTTP API v2)
+event and handles requests one at a time, like a single Lambda container.
+"""
+import os
+import sys
+import base64
+import argparse
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+class LambdaAdapter(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    handler = None
+
+    def _invoke(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        event = {
+            "rawPath": url.path,
+            "rawQueryString": url.query,
+            "headers": {k.lower(): v for k, v in self.headers.items()},
+            "requestContext": {"http": {"method": self.command, "path": url.path}},
+            "body": base64.b64encode(raw).decode("ascii") if raw else None,
+            "isBase64Encoded": bool(raw),
+        }
+        resp = self.handler(event, None)
+        body = resp.get("body") or ""
+        body = base64.b64decode(body) if resp.get("isBase64Encoded") else body.encode("utf-8")
+
+        self.send_response(resp.get("statusCode", 200))
+        for k, v in (resp.get("headers") or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_DELETE = _invoke
+
+    def log_message(self, *_args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one API worker for load tests.")
+    parser.add_argument("target", choices=["flask", "asgi", "lambda"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.target == "flask":
+        from werkzeug.serving import make_server
+        from flare_backend.app_flask import app
+        make_server(args.host, args.port, app, threaded=True).serve_forever()
+    elif args.target == "asgi":
+        import uvicorn
+        uvicorn.run("flare_backend.app_asgi:app", host=args.host, port=args.port,
+                    workers=1, log_level="warning")
+    else:
+        from flare_backend.handler_api import lambda_handler
+        LambdaAdapter.handler = staticmethod(lambda_handler)
+        HTTPServer((args.host, args.port), LambdaAdapter).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Admission control for OpenSearch calls (the prod domain is a single node).
+
+Calls are grouped into classes:
+  - "feed":   /articles pages, cheap and index-sorted; may use every slot.
+  - "search": fuzzy /search queries and /batch; capped at ADMISSION_SEARCH_MAX
+              slots and only admitted while no feed request is waiting.
+Requests that can't get a slot wait in a short per-class queue; when the queue
+is full or the wait times out they are shed with `Overloaded` (503 +
+Retry-After). Searches admitted while the node is busy run with a smaller
+`size`. Callers served from a coalesced in-flight result never get here.
+"""
+import os
+import time
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, asynccontextmanager
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "8"))
+ADMISSION_SEARCH_MAX = int(os.getenv("ADMISSION_SEARCH_MAX", "4"))
+ADMISSION_DEGRADE_AT = int(os.getenv("ADMISSION_DEGRADE_AT", "6"))
+ADMISSION_DEGRADED_SIZE = int(os.getenv("ADMISSION_DEGRADED_SIZE", "25"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+
+QUEUE_MAX = {
+    "feed": int(os.getenv("ADMISSION_FEED_QUEUE", "32")),
+    "search": int(os.getenv("ADMISSION_SEARCH_QUEUE", "8")),
+}
+QUEUE_TIMEOUT = {
+    "feed": float(os.getenv("ADMISSION_FEED_TIMEOUT", "2.0")),
+    "search": float(os.getenv("ADMISSION_SEARCH_TIMEOUT", "0.5")),
+}
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; surfaced as 503 with Retry-After."""
+
+    def __init__(self, cls, retry_after=ADMISSION_RETRY_AFTER):
+        super().__init__(f"{cls} capacity exhausted, retry in {retry_after}s")
+        self.cls = cls
+        self.retry_after = retry_after
+
+
+class Ticket:
+    __slots__ = ("degraded",)
+
+    def __init__(self, degraded=False):
+        self.degraded = degraded
+
+    def shrink(self, body):
+        """`body` with a smaller page size when admitted under pressure."""
+        if self.degraded and body.get("size", 0) > ADMISSION_DEGRADED_SIZE:
+            return dict(body, size=ADMISSION_DEGRADED_SIZE)
+        return body
+
+
+class _State:
+    """Slot accounting shared by the sync and async controllers."""
+
+    def __init__(self):
+        self.inflight = defaultdict(int)
+        self.waiting = defaultdict(int)
+        self.counts = defaultdict(lambda: defaultdict(int))
+
+    def can_enter(self, cls):
+        if sum(self.inflight.values()) >= ADMISSION_MAX_INFLIGHT:
+            return False
+        if cls == "feed":
+            return True
+        # feed has priority for freed slots
+        return self.inflight[cls] < ADMISSION_SEARCH_MAX and not self.waiting["feed"]
+
+    def enter(self, cls, queued):
+        self.inflight[cls] += 1
+        degraded = cls != "feed" and sum(self.inflight.values()) > ADMISSION_DEGRADE_AT
+        c = self.counts[cls]
+        c["admitted"] += 1
+        c["queued"] += queued
+        c["degraded"] += degraded
+        return Ticket(degraded)
+
+    def shed(self, cls):
+        self.counts[cls]["shed"] += 1
+        return Overloaded(cls)
+
+    def snapshot(self):
+        return {
+            "inflight": dict(self.inflight),
+            "waiting": dict(self.waiting),
+            "classes": {k: dict(v) for k, v in self.counts.items()},
+        }
+
+
+class AdmissionController:
+    """Thread-safe controller for the sync handlers (threaded Flask, Lambda)."""
+
+    def __init__(self):
+        self._state = _State()
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def admit(self, cls):
+        if not ADMISSION_ENABLED:
+            yield Ticket()
+            return
+
+        st = self._state
+        with self._cond:
+            queued = not st.can_enter(cls)
+            if queued:
+                if st.waiting[cls] >= QUEUE_MAX[cls]:
+                    raise st.shed(cls)
+                deadline = time.monotonic() + QUEUE_TIMEOUT[cls]
+                st.waiting[cls] += 1
+                try:
+                    while not st.can_enter(cls):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise st.shed(cls)
+                        self._cond.wait(remaining)
+                finally:
+                    st.waiting[cls] -= 1
+                    # a search may have been held back only by this waiter
+                    self._cond.notify_all()
+            ticket = st.enter(cls, queued)
+        try:
+            yield ticket
+        finally:
+            with self._cond:
+                st.inflight[cls] -= 1
+                self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return self._state.snapshot()
+
+
+class AsyncAdmissionController:
+    """Same policy for coroutines on one event loop."""
+
+    def __init__(self):
+        self._state = _State()
+        self._cond = None  # created on first use, inside the running loop
+
+    @asynccontextmanager
+    async def admit(self, cls):
+        if not ADMISSION_ENABLED:
+            yield Ticket()
+            return
+
+        st = self._state
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            queued = not st.can_enter(cls)
+            if queued:
+                if st.waiting[cls] >= QUEUE_MAX[cls]:
+                    raise st.shed(cls)
+                st.waiting[cls] += 1
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: st.can_enter(cls)),
+                        QUEUE_TIMEOUT[cls])
+                except asyncio.TimeoutError:
+                    raise st.shed(cls) from None
+                finally:
+                    st.waiting[cls] -= 1
+                    self._cond.notify_all()
+            ticket = st.enter(cls, queued)
+        try:
+            yield ticket
+        finally:
+            async with self._cond:
+                st.inflight[cls] -= 1
+                self._cond.notify_all()
+
+    def snapshot(self):
+        return self._state.snapshot()
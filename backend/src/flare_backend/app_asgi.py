@@ -0,0 +1,145 @@
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+import contextlib
+import json
+import logging
+
+from flare_backend import routes_async as core
+from flare_backend.admission import Overloaded
+from flare_backend.columnar import articles_to_columnar
+from flare_backend.opensearch_client import get_async_client
+from flare_backend.util import GZIP_THRESHOLD
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def _ndjson(docs):
+    # Pull the first doc before responding so a shed request still gets a 503
+    try:
+        first = await docs.__anext__()
+    except StopAsyncIteration:
+        return StreamingResponse(iter(()), media_type="application/x-ndjson")
+
+    async def lines():
+        yield json.dumps(first, default=str) + "\n"
+        async for doc in docs:
+            yield json.dumps(doc, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def overloaded(request, exc):
+    return JSONResponse({"error": str(exc)}, status_code=503,
+                        headers={"Retry-After": str(exc.retry_after)})
+
+
+# ---------- API routes ---------- #
+
+
+async def articles(request):
+    limit = request.query_params.get("limit")
+    after = request.query_params.get("after")
+    if request.query_params.get("format") == "ndjson":
+        return await _ndjson(core.iter_articles(limit=limit, after=after))
+    data = await core.handle_get_articles(limit=limit, after=after)
+    if request.query_params.get("format") == "columnar":
+        data = articles_to_columnar(data)
+    return JSONResponse(data)
+
+
+async def search(request):
+    q = request.query_params.get("query", "*")
+    if request.query_params.get("format") == "ndjson":
+        limit = request.query_params.get("limit")
+        return await _ndjson(core.iter_search_events(q, limit))
+    return JSONResponse(await core.handle_search_events(q))
+
+
+async def facets(request):
+    try:
+        return JSONResponse(await core.handle_get_facets(
+            concepts=request.query_params.getlist("concept"),
+            categories=request.query_params.getlist("category"),
+            start=request.query_params.get("start"),
+            end=request.query_params.get("end"),
+        ))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+async def related(request):
+    data = await core.handle_get_related(request.query_params.get("uri"))
+    if data is None:
+        return JSONResponse({"error": "Event not found"}, status_code=404)
+    return JSONResponse(data)
+
+
+async def batch(request):
+    try:
+        payload = await request.json()
+        if not isinstance(payload, dict):
+            raise ValueError("body must be a JSON object with 'requests'")
+        return JSONResponse(await core.handle_batch(payload.get("requests")))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+async def metrics(request):
+    return JSONResponse(await core.handle_get_metrics())
+
+
+async def fetch(request):
+    pages = request.query_params.get("pages", "1-1")
+    categories = request.query_params.get("categories")
+    concepts = request.query_params.getlist("concepts")
+    return JSONResponse(await core.handle_fetch_and_index(pages, categories, concepts))
+
+
+async def create_index(request):
+    return JSONResponse(await core.handle_create_index())
+
+
+async def migrate_index(request):
+    return JSONResponse(await core.handle_migrate_index())
+
+
+async def delete_index(request):
+    return JSONResponse(await core.handle_delete_index())
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    yield
+    await get_async_client().close()
+
+
+app = Starlette(
+    routes=[
+        Route("/articles", articles),
+        Route("/search", search),
+        Route("/facets", facets),
+        Route("/related", related),
+        Route("/batch", batch, methods=["POST"]),
+        Route("/metrics", metrics),
+        Route("/fetch", fetch),
+        Route("/es-index", create_index),
+        Route("/migrate-index", migrate_index, methods=["POST"]),
+        Route("/delete_index", delete_index, methods=["DELETE"]),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"]),
+        Middleware(GZipMiddleware, minimum_size=GZIP_THRESHOLD),
+    ],
+    exception_handlers={Overloaded: overloaded},
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    print(">> Running local async API on http://localhost:5001")
+    uvicorn.run("flare_backend.app_asgi:app", host="0.0.0.0", port=5001)
@@ -1,18 +1,35 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
+import json
 import logging
 
 from flare_backend.routes import (
     handle_get_articles, handle_search_events,
-    handle_fetch_and_index, handle_create_index,
-    handle_delete_index,
+    handle_fetch_and_index, handle_create_index, handle_migrate_index,
+    handle_delete_index, handle_get_metrics,
+    iter_articles, iter_search_events, handle_batch,
+    handle_get_facets, handle_get_related,
 )
+from flare_backend.admission import Overloaded
+from flare_backend.columnar import articles_to_columnar
+from flare_backend.util import ndjson_lines, maybe_gzip, prime
 from flare_backend.config import Settings
 
 app = Flask(__name__)
 CORS(app)
 logging.basicConfig(level=logging.DEBUG)
 
+
+def _ndjson(docs):
+    # No Content-Length -> chunked transfer; docs are written as they arrive
+    return Response(stream_with_context(ndjson_lines(prime(docs))),
+                    mimetype="application/x-ndjson")
+
+
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    return jsonify({"error": str(e)}), 503, {"Retry-After": str(e.retry_after)}
+
 # ---------- API routes ---------- #
 
 
@@ -21,21 +38,71 @@ def articles():
     limit = request.args.get("limit")
     after = request.args.get("after")
 
+    if request.args.get("format") == "ndjson":
+        return _ndjson(iter_articles(limit=limit, after=after))
+
     # Prefer the new signature; fall back if routes.py hasn't been updated yet
     try:
         data = handle_get_articles(limit=limit, after=after)
     except TypeError:
         data = handle_get_articles()
 
+    if request.args.get("format") == "columnar":
+        data = articles_to_columnar(data)
     return jsonify(data)
 
 
 @app.route("/search")
 def search():
     q = request.args.get("query", "*")
+    if request.args.get("format") == "ndjson":
+        return _ndjson(iter_search_events(q, request.args.get("limit")))
     return jsonify(handle_search_events(q))
 
 
+@app.route("/facets")
+def facets():
+    try:
+        return jsonify(handle_get_facets(
+            concepts=request.args.getlist("concept"),
+            categories=request.args.getlist("category"),
+            start=request.args.get("start"),
+            end=request.args.get("end"),
+        ))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/related")
+def related():
+    data = handle_get_related(request.args.get("uri"))
+    if data is None:
+        return jsonify({"error": "Event not found"}), 404
+    return jsonify(data)
+
+
+@app.route("/batch", methods=["POST"])
+def batch():
+    payload = request.get_json(silent=True)
+    try:
+        if not isinstance(payload, dict):
+            raise ValueError("body must be a JSON object with 'requests'")
+        data = handle_batch(payload.get("requests"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    text = json.dumps(data, default=str)
+    gz = maybe_gzip(text) if "gzip" in request.headers.get("Accept-Encoding", "") else None
+    if gz is None:
+        return Response(text, mimetype="application/json")
+    return Response(gz, mimetype="application/json", headers={"Content-Encoding": "gzip"})
+
+
+@app.route("/metrics")
+def metrics():
+    return jsonify(handle_get_metrics())
+
+
 @app.route("/fetch")
 def fetch():
     pages = request.args.get("pages", "1-1")
@@ -49,6 +116,11 @@ def create_index():
     return jsonify(handle_create_index())
 
 
+@app.route("/migrate-index", methods=["POST"])
+def migrate_index():
+    return jsonify(handle_migrate_index())
+
+
 @app.route("/delete_index", methods=["DELETE"])
 def delete_index():
     return jsonify(handle_delete_index())
@@ -0,0 +1,99 @@
+"""
+Opt-in compact wire format for feed pages (`/articles?format=columnar`).
+
+The page is sent as struct-of-arrays instead of an array of nested objects:
+one array per field, repeated labels (concepts, categories, locations, dates)
+replaced by indexes into a shared string table, and nested lists stored as
+flat arrays plus `offsets` (event i owns [offsets[i], offsets[i+1])).
+Each distinct concept is sent once in `conceptTable`; events reference it by
+row (`concepts.ref`) next to their own score.
+Numeric columns can be copied straight into typed arrays on the client.
+Missing values are `null`; missing labels are -1.
+"""
+
+COLUMNAR_VERSION = 2
+
+
+class _Strings:
+    def __init__(self):
+        self.table = []
+        self._index = {}
+
+    def __call__(self, value):
+        if value is None:
+            return -1
+        idx = self._index.get(value)
+        if idx is None:
+            idx = self._index[value] = len(self.table)
+            self.table.append(value)
+        return idx
+
+
+def _eng(obj):
+    return (obj or {}).get("eng")
+
+
+def encode_columnar(items, next_token=None):
+    strings = _Strings()
+    cols = {k: [] for k in (
+        "uri", "title", "summary", "image", "url", "eventDate",
+        "sentiment", "socialScore", "wgt", "totalArticleCount")}
+    location = {"label": [], "lat": [], "long": []}
+    categories = {"offsets": [0], "label": [], "wgt": []}
+    concepts = {"offsets": [0], "ref": [], "score": []}
+    table = {"label": [], "type": [], "lat": [], "long": []}
+    rows = {}
+
+    for src in items:
+        cols["uri"].append(src.get("uri"))
+        cols["title"].append(_eng(src.get("title")))
+        cols["summary"].append(_eng(src.get("summary")))
+        cols["image"].append((src.get("images") or [None])[0])
+        cols["url"].append((_eng(src.get("infoArticle")) or {}).get("url"))
+        cols["eventDate"].append(strings(src.get("eventDate")))
+        for k in ("sentiment", "socialScore", "wgt", "totalArticleCount"):
+            cols[k].append(src.get(k))
+
+        loc = src.get("location") or {}
+        location["label"].append(strings(_eng(loc.get("label"))))
+        location["lat"].append(loc.get("lat"))
+        location["long"].append(loc.get("long"))
+
+        for cat in src.get("categories") or []:
+            categories["label"].append(strings(cat.get("label")))
+            categories["wgt"].append(cat.get("wgt"))
+        categories["offsets"].append(len(categories["label"]))
+
+        for c in src.get("concepts") or []:
+            cloc = c.get("location") or {}
+            key = c.get("uri") or (_eng(c.get("label")), c.get("type"))
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = len(table["label"])
+                table["label"].append(strings(_eng(c.get("label"))))
+                table["type"].append(strings(c.get("type")))
+                table["lat"].append(cloc.get("lat"))
+                table["long"].append(cloc.get("long"))
+            concepts["ref"].append(row)
+            concepts["score"].append(c.get("score"))
+        concepts["offsets"].append(len(concepts["ref"]))
+
+    return {
+        "format": "columnar",
+        "version": COLUMNAR_VERSION,
+        "count": len(cols["uri"]),
+        "next": next_token,
+        "strings": strings.table,
+        **cols,
+        "location": location,
+        "categories": categories,
+        "concepts": concepts,
+        "conceptTable": table,
+    }
+
+
+def articles_to_columnar(data):
+    """Accepts either /articles shape: legacy list or {items, next}."""
+    if isinstance(data, list):
+        return encode_columnar(data)
+    return encode_columnar(data["items"], data.get("next"))
@@ -0,0 +1,138 @@
+"""
+Normalized concept store.
+
+Events are indexed with concept refs only (`{uri, score}`); each concept's
+label, type and location live once in the `concepts` index, keyed by URI.
+Responses are expanded back to the full concept objects from an in-process
+cache. Misses are fetched with one `mget` per page. The whole cache is dropped
+every CONCEPT_CACHE_TTL seconds so concepts re-indexed by an ingest in another
+container are picked up.
+"""
+import os
+import time
+import threading
+
+from .opensearch_client import NOT_FOUND_ERRORS
+
+CONCEPTS_INDEX = "concepts"
+CONCEPT_CACHE_TTL = float(os.getenv("CONCEPT_CACHE_TTL", "600"))
+
+# Fields of a concept stored in the `concepts` index (everything but `score`)
+CONCEPT_FIELDS = ("uri", "type", "label", "location")
+# What responses carry per concept: the same projection the feed used on
+# inline concepts, so expanding refs does not grow the payload
+CONCEPT_SOURCE = ["label.eng", "type", "location.lat", "location.long"]
+
+
+def split_concepts(ev):
+    """
+    (event doc to index, {uri: concept doc}) for one prepared event.
+    The event keeps `{uri, score}` refs plus a flat `conceptLabels` list that
+    search and facets run against. Already-normalized events pass through.
+    """
+    refs, labels, concepts = [], [], {}
+    for c in ev.get("concepts") or []:
+        uri = c.get("uri")
+        if not uri:
+            continue
+        refs.append({"uri": uri, "score": c.get("score")})
+        label = (c.get("label") or {}).get("eng")
+        if label:
+            labels.append(label)
+            concepts[uri] = {k: c[k] for k in CONCEPT_FIELDS if k in c}
+    doc = dict(ev, concepts=refs)
+    if labels or "conceptLabels" not in ev:
+        doc["conceptLabels"] = labels
+    return doc, concepts
+
+
+def concept_actions(concepts):
+    return ({"_index": CONCEPTS_INDEX, "_id": uri, "_source": doc}
+            for uri, doc in concepts.items())
+
+
+def project_concept(doc):
+    """`doc` cut down to CONCEPT_SOURCE."""
+    out = {"label": {"eng": (doc.get("label") or {}).get("eng")}, "type": doc.get("type")}
+    loc = doc.get("location")
+    if loc:
+        out["location"] = {"lat": loc.get("lat"), "long": loc.get("long")}
+    return out
+
+
+def _found(resp):
+    return {d["_id"]: d["_source"] for d in resp["docs"] if d.get("found")}
+
+
+def fetch_concepts(client, uris):
+    try:
+        return _found(client.mget(index=CONCEPTS_INDEX, body={"ids": list(uris)},
+                                  _source_includes=CONCEPT_SOURCE))
+    except NOT_FOUND_ERRORS:
+        return {}
+
+
+async def fetch_concepts_async(client, uris):
+    try:
+        return _found(await client.mget(index=CONCEPTS_INDEX, body={"ids": list(uris)},
+                                        _source_includes=CONCEPT_SOURCE))
+    except NOT_FOUND_ERRORS:
+        return {}
+
+
+class ConceptCache:
+    """
+    URI -> concept doc projected to CONCEPT_SOURCE. Expansion builds new
+    dicts; cached hits are never mutated.
+    """
+
+    def __init__(self, ttl=CONCEPT_CACHE_TTL):
+        self.ttl = ttl
+        self._docs = {}
+        self._expires = time.monotonic() + ttl
+        self._lock = threading.Lock()
+
+    def missing(self, sources):
+        """
+        (snapshot, concept URIs referenced by `sources` not in it). Pass the
+        snapshot to `add` and `expand`: a TTL reset in between swaps
+        `self._docs`, and the page must not lose the concepts it just loaded.
+        """
+        if time.monotonic() >= self._expires:
+            with self._lock:
+                self._docs = {}
+                self._expires = time.monotonic() + self.ttl
+        docs = self._docs
+        out = set()
+        for src in sources:
+            for c in src.get("concepts") or []:
+                uri = c.get("uri")
+                if uri and "label" not in c and uri not in docs:
+                    out.add(uri)
+        return docs, out
+
+    def add(self, found, requested=(), docs=None):
+        """Cache `found` ({uri: doc}); URIs requested but not found are cached as misses."""
+        with self._lock:
+            docs = self._docs if docs is None else docs
+            for uri in requested:
+                docs.setdefault(uri, None)
+            docs.update((uri, project_concept(doc)) for uri, doc in found.items())
+
+    def expand(self, sources, docs=None):
+        docs = self._docs if docs is None else docs
+        out = []
+        for src in sources:
+            refs = src.get("concepts")
+            if not refs:
+                out.append(src)
+                continue
+            concepts = []
+            for c in refs:
+                doc = None if "label" in c else docs.get(c.get("uri"))
+                concepts.append(dict(doc, score=c.get("score")) if doc else c)
+            out.append(dict(src, concepts=concepts))
+        return out
+
+    def __len__(self):
+        return len(self._docs)
@@ -10,11 +10,22 @@ class Settings:
     STAGE = os.getenv("STAGE", "local")          # local | dev | prod
     LOCAL = STAGE == "local"
 
+    # Search backend: elasticsearch (local Docker) | opensearch (AWS) | embedded
+    SEARCH_BACKEND = os.getenv(
+        "SEARCH_BACKEND",
+        "elasticsearch" if LOCAL else "opensearch"
+    )
+    # SQLite file used by the embedded backend (see embedded_search.py)
+    EMBEDDED_SEARCH_PATH = os.getenv("EMBEDDED_SEARCH_PATH", ".flare-search.sqlite3")
+
     # OpenSearch
     OPENSEARCH_ENDPOINT = os.getenv(
         "OPENSEARCH_ENDPOINT",
         "http://localhost:9200" if LOCAL else None
     )
 
+    # Connections shared by the async client (ASGI app / async Lambda core)
+    ASYNC_POOL_SIZE = int(os.getenv("ASYNC_POOL_SIZE", "25"))
+
     # API keys
     ER_APIKEY = os.getenv("ER_APIKEY")
\ No newline at end of file
@@ -0,0 +1,1253 @@
+"""
+Embedded search backend: the subset of the Elasticsearch/OpenSearch client
+API this app uses, on SQLite + FTS5 in a single on-disk file.
+
+    SEARCH_BACKEND=embedded EMBEDDED_SEARCH_PATH=.flare-search.sqlite3
+
+No server and no JVM: it opens in milliseconds and keeps its data between
+runs, for local development, CI and load tests. Supported:
+
+  * client: search (+ search_after, pit, from/size, _source filtering,
+    track_total_hits, aggs), msearch, get, mget, index, bulk,
+    open_point_in_time / close_point_in_time, indices.{exists, create,
+    delete, refresh, put_settings}; works with `opensearchpy.helpers.bulk`
+  * queries: match_all, match_none, match, match_phrase, multi_match, term,
+    terms, ids, range (with date math), exists, bool, constant_score,
+    function_score (gauss/exp/linear decay, field_value_factor, weight)
+  * aggs: terms, histogram, date_histogram
+
+Relevance is FTS5 BM25 on the mapped `text` fields (porter stemming);
+`fuzziness` is ignored and phrase `slop` becomes a NEAR distance. Keyword
+fields are kept in a side table for terms filters and aggregations. Points in
+time pin an index and expire like the real thing, but do not freeze the view.
+Unmapped fields are stored but not searchable.
+"""
+import os
+import re
+import json
+import math
+import time
+import uuid
+import queue
+import asyncio
+import sqlite3
+import calendar
+import datetime
+import threading
+from functools import lru_cache
+
+from opensearchpy import NotFoundError, RequestError, ConflictError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indices (id INTEGER PRIMARY KEY, name TEXT UNIQUE, body TEXT);
+CREATE TABLE IF NOT EXISTS docs (
+    idx INTEGER NOT NULL, id TEXT NOT NULL, source TEXT NOT NULL, UNIQUE (idx, id));
+CREATE TABLE IF NOT EXISTS terms (
+    rid INTEGER NOT NULL, field TEXT NOT NULL, value, PRIMARY KEY (field, value, rid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS terms_rid ON terms (rid);
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_NUMERIC = {"long", "integer", "short", "byte", "double", "float", "half_float",
+            "scaled_float", "unsigned_long"}
+_TERM_UNITS = {"ms": 1, "s": 1000, "m": 60_000, "h": 3_600_000, "H": 3_600_000,
+               "d": 86_400_000, "w": 7 * 86_400_000}
+
+
+# ---------- dates ---------- #
+
+def _utc(dt):
+    return dt.replace(tzinfo=datetime.timezone.utc) if dt.tzinfo is None else dt
+
+
+@lru_cache(maxsize=65536)
+def _parse_date(value):
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value / 1000, datetime.timezone.utc)
+    s = str(value).strip()
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    return _utc(datetime.datetime.fromisoformat(s))
+
+
+def _to_ms(dt):
+    return calendar.timegm(dt.utctimetuple()) * 1000 + dt.microsecond // 1000
+
+
+def date_ms(value):
+    if value is None:
+        return None
+    try:
+        return _to_ms(_parse_date(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _add_months(dt, months):
+    y, m = divmod(dt.month - 1 + months, 12)
+    year, month = dt.year + y, m + 1
+    return dt.replace(year=year, month=month,
+                      day=min(dt.day, calendar.monthrange(year, month)[1]))
+
+
+def _floor(dt, unit):
+    if unit == "y":
+        return dt.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if unit == "M":
+        return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if unit == "w":
+        dt = dt - datetime.timedelta(days=dt.weekday())
+        unit = "d"
+    if unit == "d":
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit in ("h", "H"):
+        return dt.replace(minute=0, second=0, microsecond=0)
+    if unit == "m":
+        return dt.replace(second=0, microsecond=0)
+    if unit == "s":
+        return dt.replace(microsecond=0)
+    raise RequestError(400, "parse_exception", f"unsupported date unit {unit!r}")
+
+
+def _shift(dt, n, unit):
+    if unit == "y":
+        return _add_months(dt, 12 * n)
+    if unit == "M":
+        return _add_months(dt, n)
+    return dt + datetime.timedelta(milliseconds=n * _TERM_UNITS[unit])
+
+
+_MATH_RE = re.compile(r"([+-])(\d+)([yMwdhHms])|/([yMwdhHms])")
+
+
+def resolve_date_math(expr, round_up=False):
+    """`now-30d/d`, `2024-01-01||+1M`, plain dates or epoch millis -> epoch ms."""
+    if isinstance(expr, (int, float)):
+        return int(expr)
+    s = str(expr)
+    if s.startswith("now"):
+        dt, ops = datetime.datetime.now(datetime.timezone.utc), s[3:]
+    elif "||" in s:
+        anchor, ops = s.split("||", 1)
+        dt = _parse_date(anchor)
+    else:
+        return date_ms(s)
+    for sign, n, unit, round_unit in _MATH_RE.findall(ops):
+        if round_unit:
+            dt = _floor(dt, round_unit)
+            if round_up:
+                dt = _shift(dt, 1, round_unit) - datetime.timedelta(milliseconds=1)
+        else:
+            dt = _shift(dt, int(n) * (1 if sign == "+" else -1), unit)
+    return _to_ms(dt)
+
+
+def _duration_ms(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)(ms|s|m|h|d|w)", str(value).strip())
+    if not m:
+        raise RequestError(400, "parse_exception", f"bad duration {value!r}")
+    return float(m.group(1)) * _TERM_UNITS[m.group(2)]
+
+
+def _java_format(fmt):
+    for java, py in (("yyyy", "%Y"), ("MM", "%m"), ("dd", "%d"),
+                     ("HH", "%H"), ("mm", "%M"), ("ss", "%S")):
+        fmt = fmt.replace(java, py)
+    return fmt
+
+
+def _format_ms(ms, fmt=None):
+    dt = datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc)
+    if fmt:
+        return dt.strftime(_java_format(fmt))
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+# ---------- SQL functions ---------- #
+
+def _decay(kind, value, origin, scale, offset, decay):
+    if value is None:
+        return 1.0
+    dist = max(0.0, abs(value - origin) - offset)
+    if kind == "gauss":
+        return math.exp(-dist * dist / (2 * (-scale * scale / (2 * math.log(decay)))))
+    if kind == "exp":
+        return math.exp(math.log(decay) / scale * dist)
+    return max(0.0, (scale / (1 - decay) - dist) / (scale / (1 - decay)))
+
+
+_MODIFIERS = {
+    "none": lambda v: v,
+    "log": lambda v: math.log10(v) if v > 0 else 0.0,
+    "log1p": lambda v: math.log10(v + 1) if v > -1 else 0.0,
+    "log2p": lambda v: math.log10(v + 2) if v > -2 else 0.0,
+    "ln": lambda v: math.log(v) if v > 0 else 0.0,
+    "ln1p": lambda v: math.log1p(v) if v > -1 else 0.0,
+    "ln2p": lambda v: math.log(v + 2) if v > -2 else 0.0,
+    "square": lambda v: v * v,
+    "sqrt": lambda v: math.sqrt(v) if v >= 0 else 0.0,
+    "reciprocal": lambda v: 1 / v if v else 0.0,
+}
+
+
+def _fvf(value, factor, modifier, missing):
+    if value is None:
+        value = missing
+    if value is None:
+        return 1.0
+    return _MODIFIERS[modifier](float(value) * factor)
+
+
+def _combine(mode, *values):
+    vals = [v for v in values if v is not None]
+    if not vals:
+        return 1.0
+    if mode == "sum":
+        return sum(vals)
+    if mode == "avg":
+        return sum(vals) / len(vals)
+    if mode == "max":
+        return max(vals)
+    if mode == "min":
+        return min(vals)
+    if mode == "first":
+        return vals[0]
+    out = 1.0
+    for v in vals:
+        out *= v
+    return out
+
+
+def _boost(mode, q, f):
+    q, f = q or 0.0, 1.0 if f is None else f
+    if mode == "sum":
+        return q + f
+    if mode == "replace":
+        return f
+    if mode == "avg":
+        return (q + f) / 2
+    if mode == "max":
+        return max(q, f)
+    if mode == "min":
+        return min(q, f)
+    return q * f
+
+
+def _bucket(value, interval):
+    return None if value is None else math.floor(value / interval + 1e-9)
+
+
+def _date_bucket(ms, unit, n):
+    if ms is None:
+        return None
+    if unit in ("y", "M", "w", "q"):
+        dt = _floor(datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc),
+                    "M" if unit == "q" else unit)
+        if unit == "q":
+            dt = dt.replace(month=(dt.month - 1) // 3 * 3 + 1)
+        return _to_ms(dt)
+    step = n * _TERM_UNITS[unit]
+    return ms // step * step
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.create_function("date_ms", 1, date_ms, deterministic=True)
+    conn.create_function("fs_decay", 6, _decay, deterministic=True)
+    conn.create_function("fs_fvf", 4, _fvf, deterministic=True)
+    conn.create_function("fs_combine", -1, _combine, deterministic=True)
+    conn.create_function("fs_boost", 3, _boost, deterministic=True)
+    conn.create_function("bucket", 2, _bucket, deterministic=True)
+    conn.create_function("date_bucket", 3, _date_bucket, deterministic=True)
+    # per-search full-text hits (clause, rowid) -> bm25; connection-private
+    conn.execute("CREATE TEMP TABLE text_hits (i INTEGER, rid INTEGER, s REAL, "
+                 "PRIMARY KEY (i, rid)) WITHOUT ROWID")
+    return conn
+
+
+# ---------- mappings and documents ---------- #
+
+def _jpath(path):
+    return "$" + "".join(f'."{p}"' for p in path.split("."))
+
+
+def _values(obj, parts):
+    """Leaf values at a dotted path, flattening arrays on the way."""
+    if isinstance(obj, list):
+        for item in obj:
+            yield from _values(item, parts)
+        return
+    if not parts:
+        if obj is not None:
+            yield obj
+        return
+    if isinstance(obj, dict) and parts[0] in obj:
+        yield from _values(obj[parts[0]], parts[1:])
+
+
+class IndexMeta:
+    """What the mapping says about one index: FTS columns, keyword fields, types."""
+
+    def __init__(self, id_, name, body):
+        self.id, self.name, self.body = id_, name, body
+        self.text = []          # source paths, one FTS column each
+        self.keyword = {}       # queryable field name -> source path
+        self.types = {}         # source path -> mapping type
+        self._walk(body.get("mappings", {}).get("properties", {}), "")
+        self.fts = f"fts_{id_}" if self.text else None
+        self.columns = {path: f"c{i}" for i, path in enumerate(self.text)}
+
+    def _walk(self, props, prefix):
+        for name, spec in props.items():
+            path = prefix + name
+            kind = spec.get("type", "object" if "properties" in spec else None)
+            if kind == "object" and spec.get("enabled") is False:
+                continue
+            if "properties" in spec:
+                self._walk(spec["properties"], path + ".")
+                continue
+            self.types[path] = kind
+            if kind == "text":
+                self.text.append(path)
+            elif kind == "keyword":
+                self.keyword[path] = path
+            for sub, sub_spec in (spec.get("fields") or {}).items():
+                if sub_spec.get("type") == "keyword":
+                    self.keyword[f"{path}.{sub}"] = path
+
+    def source_path(self, field):
+        return self.keyword.get(field, field)
+
+    def is_date(self, field):
+        return self.types.get(self.source_path(field)) == "date"
+
+    def sort_settings(self):
+        index = self.body.get("settings", {}).get("index", {})
+        fields = index.get("sort.field") or (index.get("sort") or {}).get("field")
+        orders = index.get("sort.order") or (index.get("sort") or {}).get("order")
+        if not fields:
+            return []
+        fields = [fields] if isinstance(fields, str) else fields
+        orders = [orders] * len(fields) if isinstance(orders, str) else (orders or [])
+        return list(zip(fields, orders + ["asc"] * (len(fields) - len(orders))))
+
+
+def _project(src, includes=None, excludes=None):
+    if includes:
+        tree = {}
+        for path in includes:
+            node = tree
+            parts = path.split(".")
+            for p in parts[:-1]:
+                node = node.setdefault(p, {})
+                if node is True:
+                    break
+            else:
+                node[parts[-1]] = True
+        src = _pick(src, tree)
+    if excludes:
+        for path in excludes:
+            _drop(src, path.split("."))
+    return src
+
+
+def _pick(obj, tree):
+    if tree is True:
+        return obj
+    if isinstance(obj, list):
+        return [p for p in (_pick(o, tree) for o in obj) if p not in (None, {})]
+    if not isinstance(obj, dict):
+        return None
+    out = {}
+    for key, sub in tree.items():
+        keys = obj.keys() if key == "*" else ([key] if key in obj else [])
+        for k in keys:
+            picked = _pick(obj[k], sub)
+            if picked not in (None, {}) or sub is True:
+                out[k] = picked
+    return out
+
+
+def _drop(obj, parts):
+    if isinstance(obj, list):
+        for o in obj:
+            _drop(o, parts)
+    elif isinstance(obj, dict) and parts[0] in obj:
+        if len(parts) == 1:
+            del obj[parts[0]]
+        else:
+            _drop(obj[parts[0]], parts[1:])
+
+
+def _merge(dst, patch):
+    for k, v in patch.items():
+        if isinstance(v, dict) and isinstance(dst.get(k), dict):
+            _merge(dst[k], v)
+        else:
+            dst[k] = v
+    return dst
+
+
+def _source_filter(spec, includes=None, excludes=None):
+    """Normalizes `_source` (body) / `_source_includes` (params) to (enabled, inc, exc)."""
+    if spec is False:
+        return False, None, None
+    if isinstance(spec, str):
+        includes = [spec]
+    elif isinstance(spec, list):
+        includes = spec
+    elif isinstance(spec, dict):
+        includes = spec.get("includes") or spec.get("include") or includes
+        excludes = spec.get("excludes") or spec.get("exclude") or excludes
+    as_list = lambda v: v.split(",") if isinstance(v, str) else v
+    return True, as_list(includes), as_list(excludes)
+
+
+# ---------- query compiler ---------- #
+
+def _msm(spec, n):
+    """minimum_should_match for `n` optional clauses (ES semantics)."""
+    if spec is None:
+        return None
+    s = str(spec).strip()
+    if "<" in s:
+        rules = sorted((int(k), v) for k, v in (r.split("<") for r in s.split()))
+        if n <= rules[0][0]:
+            return n
+        spec_for_n = [v for k, v in rules if k < n][-1]
+        return _msm(spec_for_n, n)
+    if s.endswith("%"):
+        pct = float(s[:-1])
+        count = math.floor(n * abs(pct) / 100)
+        need = n - count if pct < 0 else count
+    else:
+        v = int(s)
+        need = n + v if v < 0 else v
+    return max(0, min(n, need))
+
+
+def _fts_phrase(tokens):
+    return " ".join('"' + t.replace('"', '""') + '"' for t in tokens)
+
+
+def _field_boost(field):
+    name, _, boost = field.partition("^")
+    return name, float(boost) if boost else 1.0
+
+
+class _Query:
+    """
+    Compiles query DSL into SQL. Each clause becomes (cond, score, cand): a
+    boolean expression over `d`, a numeric score expression, and optionally a
+    subquery of candidate rowids (a superset of matches) that lets the search
+    start from the FTS/terms hits instead of scanning the whole index.
+    """
+
+    def __init__(self, meta):
+        self.meta = meta
+        self.params = {}
+        self.texts = []         # FTS5 statements filling text_hits, one per clause
+
+    def p(self, value):
+        name = f"p{len(self.params)}"
+        self.params[name] = value
+        return ":" + name
+
+    def compile(self, q):
+        if not q:
+            return "1", "1.0", None
+        if len(q) != 1:
+            raise RequestError(400, "parsing_exception", f"one query per object, got {list(q)}")
+        (kind, spec), = q.items()
+        fn = getattr(self, "_q_" + kind, None)
+        if fn is None:
+            raise RequestError(400, "parsing_exception", f"unsupported query [{kind}]")
+        return fn(spec)
+
+    # -- leaves --
+
+    def _q_match_all(self, spec):
+        return "1", str(float((spec or {}).get("boost", 1.0))), None
+
+    def _q_match_none(self, _spec):
+        return "0", "0.0", "SELECT NULL WHERE 0"
+
+    def _text(self, fields, fts_query, boost):
+        """One FTS5 query over `fields` ({path: weight}); unmapped fields never match."""
+        cols = {self.meta.columns[f]: w for f, w in fields.items() if f in self.meta.columns}
+        if not cols or not fts_query:
+            return self._q_match_none(None)
+        i = len(self.texts)
+        weights = ", ".join(str(cols.get(f"c{n}", 0.0)) for n in range(len(self.meta.text)))
+        match = "{" + " ".join(cols) + "} : (" + fts_query + ")"
+        self.texts.append((
+            f"INSERT INTO text_hits (i, rid, s) SELECT {i}, rowid, "
+            f"-bm25({self.meta.fts}, {weights}) FROM {self.meta.fts} "
+            f"WHERE {self.meta.fts} MATCH ?", match))
+        hit = f"FROM text_hits WHERE i = {i} AND rid = d.rowid"
+        return (f"EXISTS (SELECT 1 {hit})", f"COALESCE((SELECT s {hit}), 0) * {float(boost)}",
+                f"SELECT rid FROM text_hits WHERE i = {i}")
+
+    def _match_args(self, spec, key="query"):
+        (field, arg), = spec.items()
+        return field, (arg if isinstance(arg, dict) else {key: arg})
+
+    def _text_terms(self, fields, text, operator="or", msm=None, boost=1.0):
+        """match / multi_match over tokens; `minimum_should_match` counts tokens."""
+        tokens = list(dict.fromkeys(t.lower() for t in _TOKEN_RE.findall(str(text))))
+        if not tokens:
+            return self._q_match_none(None)
+        quoted = ['"' + t.replace('"', '""') + '"' for t in tokens]
+        need = len(quoted) if str(operator).lower() == "and" else (_msm(msm, len(quoted)) or 1)
+        if need >= len(quoted):
+            return self._text(fields, " AND ".join(quoted), boost)
+        if need == 1:
+            return self._text(fields, " OR ".join(quoted), boost)
+        parts = [self._text(fields, t, boost) for t in quoted]
+        return _at_least(parts, need), " + ".join(s for _, s, _ in parts), _union(parts)
+
+    def _q_match(self, spec):
+        field, a = self._match_args(spec)
+        if field not in self.meta.columns:
+            return self._q_term({field: {"value": a["query"], "boost": a.get("boost", 1.0)}})
+        return self._text_terms({field: 1.0}, a["query"], a.get("operator", "or"),
+                                a.get("minimum_should_match"), a.get("boost", 1.0))
+
+    def _phrase(self, text, slop):
+        tokens = [t.lower() for t in _TOKEN_RE.findall(str(text))]
+        if len(tokens) <= 1 or not slop:
+            return _fts_phrase(tokens) if len(tokens) == 1 else (
+                '"' + " ".join(tokens) + '"' if tokens else None)
+        return f"NEAR({_fts_phrase(tokens)}, {int(slop) + len(tokens) - 1})"
+
+    def _q_match_phrase(self, spec):
+        field, a = self._match_args(spec)
+        return self._text({field: 1.0}, self._phrase(a["query"], a.get("slop", 0)),
+                          a.get("boost", 1.0))
+
+    def _q_multi_match(self, spec):
+        fields = dict(_field_boost(f) for f in spec.get("fields") or self.meta.text)
+        if spec.get("type") in ("phrase", "phrase_prefix"):
+            return self._text(fields, self._phrase(spec["query"], spec.get("slop", 0)),
+                              spec.get("boost", 1.0))
+        return self._text_terms(fields, spec["query"], spec.get("operator", "or"),
+                                spec.get("minimum_should_match"), spec.get("boost", 1.0))
+
+    def _keyword_in(self, field, values, boost=1.0):
+        values = list(values)
+        if not values:
+            return self._q_match_none(None)
+        marks = ", ".join(self.p(v) for v in values)
+        if field in self.meta.keyword:
+            cand = (f"SELECT rid FROM terms WHERE field = {self.p(field)} "
+                    f"AND value IN ({marks})")
+            return f"d.rowid IN ({cand})", str(float(boost)), cand
+        if field == "_id":
+            return f"d.id IN ({marks})", str(float(boost)), None
+        cond = f"json_extract(d.source, {self.p(_jpath(field))}) IN ({marks})"
+        return cond, str(float(boost)), None
+
+    def _q_term(self, spec):
+        field, a = self._match_args(spec, "value")
+        return self._keyword_in(field, [a["value"]], a.get("boost", 1.0))
+
+    def _q_terms(self, spec):
+        spec = dict(spec)
+        boost = spec.pop("boost", 1.0)
+        (field, values), = spec.items()
+        return self._keyword_in(field, values, boost)
+
+    def _q_ids(self, spec):
+        return self._keyword_in("_id", spec.get("values", []))
+
+    def _q_exists(self, spec):
+        field = spec["field"]
+        if field in self.meta.keyword:
+            cand = f"SELECT rid FROM terms WHERE field = {self.p(field)}"
+            return f"d.rowid IN ({cand})", "1.0", cand
+        return f"json_extract(d.source, {self.p(_jpath(field))}) IS NOT NULL", "1.0", None
+
+    def value_sql(self, field):
+        expr = f"json_extract(d.source, {self.p(_jpath(self.meta.source_path(field)))})"
+        return f"date_ms({expr})" if self.meta.is_date(field) else expr
+
+    def _q_range(self, spec):
+        (field, bounds), = spec.items()
+        is_date = self.meta.is_date(field)
+        expr = self.value_sql(field)
+        conds = []
+        for op, sql_op in (("gte", ">="), ("gt", ">"), ("lte", "<="), ("lt", "<")):
+            if bounds.get(op) is None:
+                continue
+            value = bounds[op]
+            if is_date:
+                value = resolve_date_math(value, round_up=op in ("lte", "gt"))
+            conds.append(f"{expr} {sql_op} {self.p(value)}")
+        return " AND ".join(conds) or "1", str(float(bounds.get("boost", 1.0))), None
+
+    # -- compound --
+
+    def _q_bool(self, spec):
+        def clauses(key):
+            v = spec.get(key) or []
+            return [self.compile(c) for c in (v if isinstance(v, list) else [v])]
+
+        must, filt, should, must_not = (clauses(k) for k in ("must", "filter", "should", "must_not"))
+        conds = [c for c, _, _ in must + filt] + [f"NOT COALESCE(({c}), 0)" for c, _, _ in must_not]
+        scores = [s for _, s, _ in must]
+        # any required clause with candidates narrows the whole bool
+        cand = next((k for _, _, k in must + filt if k), None)
+        if should:
+            default = 0 if (must or filt) else 1
+            need = _msm(spec.get("minimum_should_match"), len(should))
+            need = default if need is None else need
+            if need:
+                conds.append(_at_least(should, need))
+                cand = cand or _union(should)
+            scores += [f"(CASE WHEN {c} THEN {s} ELSE 0 END)" for c, s, _ in should]
+        boost = float(spec.get("boost", 1.0))
+        score = "(" + (" + ".join(scores) or "0.0") + f") * {boost}"
+        return " AND ".join(f"({c})" for c in conds) or "1", score, cand
+
+    def _q_constant_score(self, spec):
+        cond, _, cand = self.compile(spec["filter"])
+        return cond, str(float(spec.get("boost", 1.0))), cand
+
+    def _function(self, fn):
+        weight = float(fn.get("weight", 1.0))
+        if "field_value_factor" in fn:
+            f = fn["field_value_factor"]
+            expr = (f"fs_fvf({self.value_sql(f['field'])}, {float(f.get('factor', 1.0))}, "
+                    f"{self.p(f.get('modifier', 'none'))}, {self.p(f.get('missing'))})")
+        else:
+            kind = next((k for k in ("gauss", "exp", "linear") if k in fn), None)
+            if kind is None:
+                if "weight" not in fn:
+                    raise RequestError(400, "parsing_exception",
+                                       f"unsupported function {sorted(fn)}")
+                expr = "1.0"
+            else:
+                spec = dict(fn[kind])
+                spec.pop("multi_value_mode", None)  # single-valued fields only
+                (field, d), = spec.items()
+                if self.meta.is_date(field):
+                    origin = resolve_date_math(d.get("origin", "now"))
+                    scale, offset = _duration_ms(d["scale"]), _duration_ms(d.get("offset", 0))
+                else:
+                    origin, scale = float(d["origin"]), float(d["scale"])
+                    offset = float(d.get("offset", 0))
+                expr = (f"fs_decay({self.p(kind)}, {self.value_sql(field)}, {origin}, "
+                        f"{scale}, {offset}, {float(d.get('decay', 0.5))})")
+        expr = f"({expr}) * {weight}"
+        if "filter" in fn:
+            cond, _, _ = self.compile(fn["filter"])
+            expr = f"(CASE WHEN {cond} THEN {expr} END)"
+        return expr
+
+    def _q_function_score(self, spec):
+        cond, qscore, cand = self.compile(spec.get("query") or {"match_all": {}})
+        fns = list(spec.get("functions") or [])
+        for key in ("field_value_factor", "gauss", "exp", "linear"):
+            if key in spec:
+                fns.append({key: spec[key]})
+        if "weight" in spec and not fns:
+            fns.append({"weight": spec["weight"]})
+        if not fns:
+            return cond, qscore, cand
+        combined = f"fs_combine({self.p(spec.get('score_mode', 'multiply'))}, " + \
+            ", ".join(self._function(f) for f in fns) + ")"
+        score = f"fs_boost({self.p(spec.get('boost_mode', 'multiply'))}, {qscore}, {combined})"
+        return cond, f"({score}) * {float(spec.get('boost', 1.0))}", cand
+
+
+def _at_least(clauses, need):
+    if need == 1:
+        return " OR ".join(f"({c})" for c, _, _ in clauses)
+    return "(" + " + ".join(f"COALESCE(({c}), 0)" for c, _, _ in clauses) + f") >= {need}"
+
+
+def _union(clauses):
+    cands = [k for _, _, k in clauses]
+    return None if None in cands else " UNION ".join(cands)
+
+
+# ---------- store ---------- #
+
+class _Indices:
+    def __init__(self, store):
+        self._store = store
+
+    def exists(self, index, **_):
+        return all(self._store.meta(name) is not None for name in _names(index))
+
+    def create(self, index, body=None, **_):
+        return self._store.create_index(index, body or {})
+
+    def delete(self, index, **_):
+        for name in _names(index):
+            self._store.delete_index(name)
+        return {"acknowledged": True}
+
+    def refresh(self, index=None, **_):
+        for name in _names(index):
+            self._store.require(name)
+        return {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+
+    def put_settings(self, body=None, index=None, **_):
+        for name in _names(index):
+            self._store.require(name)
+        return {"acknowledged": True}
+
+
+def _names(index):
+    if index is None:
+        return []
+    return index.split(",") if isinstance(index, str) else list(index)
+
+
+class _Serializer:
+    mimetype = "application/json"
+
+    def dumps(self, data):
+        return data if isinstance(data, str) else json.dumps(data, default=str)
+
+    def loads(self, s):
+        return json.loads(s)
+
+
+class _Transport:
+    serializer = _Serializer()
+
+
+class EmbeddedSearch:
+    """Synchronous client; safe to share between threads (pooled connections)."""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.transport = _Transport()
+        self.indices = _Indices(self)
+        self._pool = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._metas, self._meta_version = {}, None
+        self._pits = {}
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    # -- connections and metadata --
+
+    class _Checkout:
+        def __init__(self, store):
+            self.store = store
+
+        def __enter__(self):
+            try:
+                self.conn = self.store._pool.get_nowait()
+            except queue.Empty:
+                self.conn = _connect(self.store.path)
+            return self.conn
+
+        def __exit__(self, exc_type, *_):
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+            self.store._pool.put(self.conn)
+
+    def _conn(self):
+        return self._Checkout(self)
+
+    def meta(self, name):
+        with self._conn() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self._meta_version:
+                rows = conn.execute("SELECT id, name, body FROM indices").fetchall()
+                with self._lock:
+                    self._metas = {n: IndexMeta(i, n, json.loads(b)) for i, n, b in rows}
+                    self._meta_version = version
+        return self._metas.get(name)
+
+    def require(self, name):
+        meta = self.meta(name)
+        if meta is None:
+            raise NotFoundError(404, "index_not_found_exception", {
+                "error": {"type": "index_not_found_exception",
+                          "reason": f"no such index [{name}]", "index": name}})
+        return meta
+
+    def _bump(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.execute(f"PRAGMA user_version = {version + 1}")
+
+    def create_index(self, name, body):
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM indices WHERE name = ?", (name,)).fetchone():
+                raise RequestError(400, "resource_already_exists_exception",
+                                   f"index [{name}] already exists")
+            id_ = conn.execute("INSERT INTO indices (name, body) VALUES (?, ?)",
+                               (name, json.dumps(body))).lastrowid
+            meta = IndexMeta(id_, name, body)
+            if meta.fts:
+                cols = ", ".join(meta.columns.values())
+                conn.execute(f"CREATE VIRTUAL TABLE {meta.fts} USING fts5("
+                             f"{cols}, tokenize = 'porter unicode61')")
+            sort = meta.sort_settings()
+            if sort:
+                exprs = ", ".join(f"json_extract(source, '{_jpath(f)}') {o.upper()}"
+                                  for f, o in sort)
+                conn.execute(f"CREATE INDEX sort_{id_} ON docs (idx, {exprs}, "
+                             f"id {sort[-1][1].upper()})")
+            self._bump(conn)
+        return {"acknowledged": True, "index": name}
+
+    def delete_index(self, name):
+        meta = self.require(name)
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM terms WHERE rid IN (SELECT rowid FROM docs WHERE idx = ?)",
+                         (meta.id,))
+            conn.execute("DELETE FROM docs WHERE idx = ?", (meta.id,))
+            conn.execute("DELETE FROM indices WHERE id = ?", (meta.id,))
+            if meta.fts:
+                conn.execute(f"DROP TABLE IF EXISTS {meta.fts}")
+            conn.execute(f"DROP INDEX IF EXISTS sort_{meta.id}")
+            self._bump(conn)
+
+    def _auto_create(self, name):
+        meta = self.meta(name)
+        if meta is None:
+            try:
+                self.create_index(name, {})
+            except RequestError:
+                pass  # created concurrently
+            meta = self.require(name)
+        return meta
+
+    # -- documents --
+
+    def _write(self, conn, meta, doc_id, source):
+        row = conn.execute("SELECT rowid FROM docs WHERE idx = ? AND id = ?",
+                           (meta.id, doc_id)).fetchone()
+        text = json.dumps(source, separators=(",", ":"), default=str)
+        if row:
+            rid = row[0]
+            conn.execute("UPDATE docs SET source = ? WHERE rowid = ?", (text, rid))
+            conn.execute("DELETE FROM terms WHERE rid = ?", (rid,))
+            if meta.fts:
+                conn.execute(f"DELETE FROM {meta.fts} WHERE rowid = ?", (rid,))
+        else:
+            rid = conn.execute("INSERT INTO docs (idx, id, source) VALUES (?, ?, ?)",
+                               (meta.id, doc_id, text)).lastrowid
+        if meta.fts:
+            cols = [" ".join(str(v) for v in _values(source, p.split("."))) for p in meta.text]
+            marks = ", ".join("?" * (len(cols) + 1))
+            conn.execute(f"INSERT INTO {meta.fts} (rowid, {', '.join(meta.columns.values())}) "
+                         f"VALUES ({marks})", (rid, *cols))
+        rows = [(rid, field, v) for field, path in meta.keyword.items()
+                for v in _values(source, path.split("."))
+                if isinstance(v, (str, int, float))]
+        if rows:
+            conn.executemany("INSERT OR IGNORE INTO terms (rid, field, value) VALUES (?, ?, ?)",
+                             rows)
+        return "updated" if row else "created"
+
+    def _read(self, conn, meta, doc_id):
+        row = conn.execute("SELECT source FROM docs WHERE idx = ? AND id = ?",
+                           (meta.id, str(doc_id))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def index(self, index, body=None, id=None, document=None, **_):
+        meta = self._auto_create(index)
+        doc_id = str(id) if id is not None else uuid.uuid4().hex
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            result = self._write(conn, meta, doc_id, body if body is not None else document)
+        return {"_index": index, "_id": doc_id, "_version": 1, "result": result}
+
+    def get(self, index, id, _source_includes=None, _source_excludes=None, _source=None, **_):
+        meta = self.require(index)
+        with self._conn() as conn:
+            src = self._read(conn, meta, id)
+        if src is None:
+            raise NotFoundError(404, "not_found", {"_index": index, "_id": id, "found": False})
+        enabled, inc, exc = _source_filter(_source, _source_includes, _source_excludes)
+        out = {"_index": index, "_id": str(id), "_version": 1, "found": True}
+        if enabled:
+            out["_source"] = _project(src, inc, exc)
+        return out
+
+    def mget(self, body=None, index=None, **_):
+        specs = [{"_id": i} for i in body.get("ids", [])] if "ids" in body else body["docs"]
+        docs = []
+        with self._conn() as conn:
+            for spec in specs:
+                name = spec.get("_index", index)
+                meta = self.meta(name)
+                src = self._read(conn, meta, spec["_id"]) if meta else None
+                doc = {"_index": name, "_id": str(spec["_id"]), "found": src is not None}
+                if src is not None:
+                    doc["_source"] = src
+                docs.append(doc)
+        return {"docs": docs}
+
+    def bulk(self, body=None, index=None, **_):
+        lines = body
+        if isinstance(body, (str, bytes)):
+            text = body.decode("utf-8") if isinstance(body, bytes) else body
+            lines = [json.loads(l) for l in text.splitlines() if l.strip()]
+        lines = [json.loads(l) if isinstance(l, (str, bytes)) else l for l in lines]
+
+        t0, items, errors = time.perf_counter(), [], False
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            it = iter(lines)
+            for action in it:
+                (op, info), = action.items()
+                name, doc_id = info.get("_index", index), info.get("_id")
+                doc = next(it) if op != "delete" else None
+                item = {"_index": name, "_id": doc_id}
+                try:
+                    item.update(self._bulk_op(conn, op, name, doc_id, doc))
+                except (NotFoundError, ConflictError, RequestError) as e:
+                    errors = True
+                    item.update(status=e.status_code,
+                                error={"type": e.error, "reason": str(e.info)})
+                items.append({op: item})
+        return {"took": int((time.perf_counter() - t0) * 1000), "errors": errors, "items": items}
+
+    def _bulk_op(self, conn, op, name, doc_id, doc):
+        meta = self.meta(name)
+        if meta is None:
+            if op in ("index", "create"):
+                conn.execute("COMMIT")
+                meta = self._auto_create(name)
+                conn.execute("BEGIN IMMEDIATE")
+            else:
+                self.require(name)
+        doc_id = str(doc_id) if doc_id is not None else uuid.uuid4().hex
+        if op in ("index", "create"):
+            if op == "create" and self._read(conn, meta, doc_id) is not None:
+                raise ConflictError(409, "version_conflict_engine_exception",
+                                    f"[{doc_id}]: document already exists")
+            result = self._write(conn, meta, doc_id, doc)
+            return {"_id": doc_id, "result": result, "status": 201 if result == "created" else 200}
+        if op == "update":
+            current = self._read(conn, meta, doc_id)
+            if current is None:
+                if doc.get("doc_as_upsert"):
+                    current = {}
+                elif "upsert" in doc:
+                    return {"result": self._write(conn, meta, doc_id, doc["upsert"]),
+                            "status": 201}
+                else:
+                    raise NotFoundError(404, "document_missing_exception",
+                                        f"[{doc_id}]: document missing")
+            self._write(conn, meta, doc_id, _merge(current, doc.get("doc") or {}))
+            return {"result": "updated", "status": 200}
+        if op == "delete":
+            row = conn.execute("SELECT rowid FROM docs WHERE idx = ? AND id = ?",
+                               (meta.id, doc_id)).fetchone()
+            if row is None:
+                return {"result": "not_found", "status": 404}
+            conn.execute("DELETE FROM docs WHERE rowid = ?", row)
+            conn.execute("DELETE FROM terms WHERE rid = ?", row)
+            if meta.fts:
+                conn.execute(f"DELETE FROM {meta.fts} WHERE rowid = ?", row)
+            return {"result": "deleted", "status": 200}
+        raise RequestError(400, "illegal_argument_exception", f"unknown bulk op [{op}]")
+
+    # -- points in time --
+
+    def open_point_in_time(self, index, keep_alive="1m", **_):
+        self.require(index)
+        pit_id = uuid.uuid4().hex
+        with self._lock:
+            self._pits[pit_id] = (index, time.monotonic() + _duration_ms(keep_alive) / 1000)
+        return {"id": pit_id}
+
+    def close_point_in_time(self, body=None, id=None, **_):
+        with self._lock:
+            found = self._pits.pop(id or (body or {}).get("id"), None) is not None
+        return {"succeeded": found, "num_freed": int(found)}
+
+    def _pit_index(self, pit):
+        now = time.monotonic()
+        with self._lock:
+            self._pits = {k: v for k, v in self._pits.items() if v[1] > now}
+            entry = self._pits.get(pit["id"])
+            if entry is None:
+                raise NotFoundError(404, "search_context_missing_exception",
+                                    "No search context found for id")
+            keep = pit.get("keep_alive")
+            if keep:
+                self._pits[pit["id"]] = (entry[0], now + _duration_ms(keep) / 1000)
+            return entry[0]
+
+    # -- search --
+
+    def search(self, body=None, index=None, **params):
+        body = dict(body or {})
+        for key in ("query", "size", "from_", "sort", "aggs", "aggregations", "_source",
+                    "search_after", "pit", "track_total_hits"):
+            if key in params:
+                body[key.rstrip("_")] = params.pop(key)
+        t0 = time.perf_counter()
+        pit = body.get("pit")
+        name = self._pit_index(pit) if pit else (_names(index) or [None])[0]
+        if name is None:
+            raise RequestError(400, "action_request_validation_exception", "no index given")
+        meta = self.require(name)
+
+        with self._conn() as conn:
+            resp = self._search(conn, meta, body)
+        resp["took"] = int((time.perf_counter() - t0) * 1000)
+        if pit:
+            resp["pit_id"] = pit["id"]
+        return resp
+
+    def _sort_keys(self, q, sort):
+        keys = []
+        for s in ([sort] if isinstance(sort, (str, dict)) else sort or []):
+            if isinstance(s, str):
+                field, order = s, "desc" if s == "_score" else "asc"
+            else:
+                (field, spec), = s.items()
+                order = spec.get("order", "asc") if isinstance(spec, dict) else spec
+            if field == "_score":
+                keys.append(("_score", "desc" if order == "desc" else "asc"))
+            elif field in ("_doc", "_shard_doc"):
+                keys.append(("d.id", order))
+            else:
+                path = _jpath(q.meta.source_path(field))
+                keys.append((f"json_extract(d.source, '{path}')", order))
+        if not keys:
+            keys.append(("_score", "desc"))
+        return keys
+
+    def _search(self, conn, meta, body):
+        q = _Query(meta)
+        cond, score, cand = q.compile(body.get("query"))
+        sort = self._sort_keys(q, body.get("sort"))
+        explicit_sort = bool(body.get("sort"))
+        scored = (not explicit_sort or body.get("track_scores")
+                  or any(expr == "_score" for expr, _ in sort))
+        tiebreak = sort[-1][1]
+        conn.execute("DELETE FROM text_hits")
+        for sql, match in q.texts:
+            conn.execute(sql, (match,))
+        # with candidates, drive from their rowids (`+` keeps the idx index out of it)
+        base = ("FROM docs d WHERE "
+                + (f"d.rowid IN ({cand}) AND +d.idx = {q.p(meta.id)}" if cand
+                   else f"d.idx = {q.p(meta.id)}")
+                + f" AND ({cond})")
+
+        size = int(body.get("size", 10))
+        offset = int(body.get("from", 0))
+        hits, max_score = [], None
+        if size > 0:
+            names = ["_score" if expr == "_score" else f"k{i}" for i, (expr, _) in enumerate(sort)]
+            cols = "".join(f", {expr} AS {name}" for name, (expr, _) in zip(names, sort)
+                           if name != "_score")
+            where = ""
+            after = body.get("search_after")
+            if after:
+                # row-value comparison spelled out, since the orders may be mixed
+                keys = [(name, o) for name, (_, o) in zip(names, sort)]
+                if len(after) > len(sort):
+                    keys.append(("_id", tiebreak))
+                keys = keys[:len(after)]
+                ors = []
+                for i, (k, o) in enumerate(keys):
+                    eqs = [f"{kj} = {q.p(after[j])}" for j, (kj, _) in enumerate(keys[:i])]
+                    eqs.append(f"{k} {'<' if o == 'desc' else '>'} {q.p(after[i])}")
+                    ors.append("(" + " AND ".join(eqs) + ")")
+                where = "WHERE " + " OR ".join(ors)
+            order = ", ".join(f"{name} {o.upper()}" for name, (_, o) in zip(names, sort))
+            sql = (f"SELECT _rid, _id, _score, {', '.join(names)} FROM ("
+                   f"SELECT d.rowid AS _rid, d.id AS _id, {score if scored else 'NULL'} AS _score"
+                   f"{cols} {base}) {where} "
+                   f"ORDER BY {order}, _id {tiebreak.upper()} "
+                   f"LIMIT {q.p(size)} OFFSET {q.p(offset)}")
+            rows = conn.execute(sql, q.params).fetchall()
+            sources = {}
+            if rows:
+                marks = ",".join(str(int(r[0])) for r in rows)
+                sources = dict(conn.execute(
+                    f"SELECT rowid, source FROM docs WHERE rowid IN ({marks})").fetchall())
+            enabled, inc, exc = _source_filter(body.get("_source"))
+            for row in rows:
+                rid, doc_id, sc, keys = row[0], row[1], row[2], list(row[3:])
+                hit = {"_index": meta.name, "_id": doc_id, "_score": sc}
+                if enabled:
+                    hit["_source"] = _project(json.loads(sources[rid]), inc, exc)
+                if explicit_sort:
+                    hit["sort"] = keys + ([doc_id] if body.get("pit") else [])
+                hits.append(hit)
+                if sc is not None:
+                    max_score = sc if max_score is None else max(max_score, sc)
+
+        out = {"timed_out": False,
+               "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+               "hits": {"max_score": max_score, "hits": hits}}
+        track = body.get("track_total_hits", 10_000)
+        if track is not False:
+            limit = None if track is True else int(track)
+            count_sql = f"SELECT COUNT(*) FROM (SELECT 1 {base}" + \
+                (f" LIMIT {limit + 1})" if limit is not None else ")")
+            n = conn.execute(count_sql, q.params).fetchone()[0]
+            relation = "gte" if limit is not None and n > limit else "eq"
+            out["hits"]["total"] = {"value": min(n, limit) if limit is not None else n,
+                                    "relation": relation}
+
+        aggs = body.get("aggs") or body.get("aggregations")
+        if aggs:
+            hits_cte = f"WITH h AS MATERIALIZED (SELECT d.rowid AS rid {base})"
+            out["aggregations"] = {
+                name: self._agg(conn, q, hits_cte, name, spec)
+                for name, spec in aggs.items()}
+        return out
+
+    # -- aggregations --
+
+    def _agg(self, conn, q, ctes, name, spec):
+        kinds = [k for k in spec if k not in ("meta",)]
+        if len(kinds) != 1 or kinds[0] not in ("terms", "histogram", "date_histogram"):
+            raise RequestError(400, "parsing_exception", f"unsupported aggregation [{name}]: {kinds}")
+        kind = kinds[0]
+        a = spec[kind]
+        field = a["field"]
+        value = f"json_extract(x.source, {q.p(_jpath(q.meta.source_path(field)))})"
+
+        if kind == "terms":
+            size = int(a.get("size", 10))
+            if field in q.meta.keyword:
+                sql = (f"{ctes} SELECT t.value, COUNT(*) AS c FROM terms t JOIN h ON h.rid = t.rid "
+                       f"WHERE t.field = {q.p(field)} GROUP BY t.value ORDER BY c DESC, t.value")
+            else:
+                sql = (f"{ctes} SELECT {value} AS v, COUNT(*) AS c FROM h "
+                       f"JOIN docs x ON x.rowid = h.rid WHERE v IS NOT NULL "
+                       f"GROUP BY v ORDER BY c DESC, v")
+            rows = conn.execute(sql, q.params).fetchall()
+            return {"doc_count_error_upper_bound": 0,
+                    "sum_other_doc_count": sum(c for _, c in rows[size:]),
+                    "buckets": [{"key": k, "doc_count": c} for k, c in rows[:size]]}
+
+        if kind == "histogram":
+            interval = float(a["interval"])
+            rows = dict(conn.execute(
+                f"{ctes} SELECT bucket({value}, {interval}) AS b, COUNT(*) FROM h "
+                f"JOIN docs x ON x.rowid = h.rid WHERE b IS NOT NULL GROUP BY b",
+                q.params).fetchall())
+            bounds = a.get("extended_bounds") or {}
+            return {"buckets": self._fill(
+                rows, a.get("min_doc_count", 0),
+                [_bucket(bounds[k], interval) for k in ("min", "max") if k in bounds],
+                lambda b: b + 1,
+                lambda b, c: {"key": round(b * interval, 10), "doc_count": c})}
+
+        # date_histogram
+        unit, n = "d", 1
+        if "calendar_interval" in a:
+            ci = str(a["calendar_interval"])
+            unit = {"minute": "m", "hour": "h", "day": "d", "week": "w", "month": "M",
+                    "quarter": "q", "year": "y"}.get(ci, ci.lstrip("1"))
+        else:
+            m = re.fullmatch(r"(\d+)(ms|s|m|h|d)", str(a.get("fixed_interval") or a.get("interval")))
+            if not m:
+                raise RequestError(400, "parsing_exception", f"bad interval in [{name}]")
+            n, unit = int(m.group(1)), m.group(2)
+        expr = f"date_bucket(date_ms({value}), {q.p(unit)}, {n})"
+        rows = dict(conn.execute(
+            f"{ctes} SELECT {expr} AS b, COUNT(*) FROM h JOIN docs x ON x.rowid = h.rid "
+            f"WHERE b IS NOT NULL GROUP BY b", q.params).fetchall())
+        bounds = a.get("extended_bounds") or {}
+        fmt = a.get("format")
+
+        def step(ms):
+            if unit in ("y", "M", "q"):
+                dt = datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc)
+                return _to_ms(_add_months(dt, {"y": 12, "M": 1, "q": 3}[unit]))
+            return ms + (7 * 86_400_000 if unit == "w" else n * _TERM_UNITS[unit])
+
+        return {"buckets": self._fill(
+            rows, a.get("min_doc_count", 1),
+            [_date_bucket(resolve_date_math(bounds[k]), unit, n) for k in ("min", "max") if k in bounds],
+            step,
+            lambda b, c: {"key_as_string": _format_ms(b, fmt), "key": b, "doc_count": c})}
+
+    @staticmethod
+    def _fill(rows, min_doc_count, bounds, step, make):
+        if not rows and not bounds:
+            return []
+        if min_doc_count:
+            return [make(b, c) for b, c in sorted(rows.items()) if c >= min_doc_count]
+        keys = list(rows) + bounds
+        b, hi, out = min(keys), max(keys), []
+        while b <= hi:
+            out.append(make(b, rows.get(b, 0)))
+            b = step(b)
+        return out
+
+    # -- multi search --
+
+    def msearch(self, body=None, index=None, **_):
+        lines = body
+        if isinstance(body, (str, bytes)):
+            text = body.decode("utf-8") if isinstance(body, bytes) else body
+            lines = [json.loads(l) for l in text.splitlines() if l.strip()]
+        t0, responses = time.perf_counter(), []
+        for header, search_body in zip(lines[::2], lines[1::2]):
+            try:
+                resp = self.search(body=search_body, index=header.get("index", index))
+                resp["status"] = 200
+            except (NotFoundError, RequestError) as e:
+                resp = {"error": {"type": e.error, "reason": str(e.info)},
+                        "status": e.status_code}
+            responses.append(resp)
+        return {"took": int((time.perf_counter() - t0) * 1000), "responses": responses}
+
+    def ping(self, **_):
+        return True
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class _AsyncIndices:
+    def __init__(self, indices):
+        self._indices = indices
+
+    def __getattr__(self, name):
+        fn = getattr(self._indices, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return call
+
+
+class AsyncEmbeddedSearch:
+    """Async twin of `EmbeddedSearch`: same store, calls run in worker threads."""
+
+    def __init__(self, store):
+        self._store = store
+        self.indices = _AsyncIndices(store.indices)
+
+    def __getattr__(self, name):
+        fn = getattr(self._store, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return call
+
+    async def close(self):
+        # the sync client owns the store and its connections
+        return None
@@ -1,23 +1,108 @@
+import os
+import asyncio
 from urllib.parse import parse_qs
-from .routes import handle_get_articles, handle_search_events
-from .util import json_resp
+from .routes import (
+    handle_get_articles, handle_search_events, handle_get_metrics,
+    iter_articles, iter_search_events, handle_batch,
+    handle_get_facets, handle_get_related,
+)
+from .admission import Overloaded
+from .columnar import articles_to_columnar
+from .util import json_resp, ndjson_resp, request_json, overloaded_resp
+
+# ASYNC_CORE=1 -> serve through routes_async on one event loop that lives as
+# long as the container, so the async client's connection pool is reused
+# across invocations.
+ASYNC_CORE = os.getenv("ASYNC_CORE", "0") == "1"
+_loop = None
+
+
+def _run(coro):
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
 
 
 def lambda_handler(event, _ctx):
+    try:
+        return _route(event)
+    except Overloaded as e:
+        return overloaded_resp(e)
+
+
+def _route(event):
     path = event.get("rawPath", "")
     qs = parse_qs(event.get("rawQueryString", ""))
 
     if path == "/articles":
         limit = qs.get("limit", [None])[0]
         after = qs.get("after", [None])[0]
-        try:
-            body = handle_get_articles(limit=limit, after=after)
-        except TypeError:
-            body = handle_get_articles()
+        if qs.get("format", [None])[0] == "ndjson":
+            return ndjson_resp(iter_articles(limit=limit, after=after))
+        if ASYNC_CORE:
+            from . import routes_async
+            body = _run(routes_async.handle_get_articles(limit=limit, after=after))
+        else:
+            try:
+                body = handle_get_articles(limit=limit, after=after)
+            except TypeError:
+                body = handle_get_articles()
+        if qs.get("format", [None])[0] == "columnar":
+            body = articles_to_columnar(body)
         return json_resp(body)
 
     if path == "/search":
         q = qs.get("query", ["*"])[0]
+        if qs.get("format", [None])[0] == "ndjson":
+            return ndjson_resp(iter_search_events(q, qs.get("limit", [None])[0]))
+        if ASYNC_CORE:
+            from . import routes_async
+            return json_resp(_run(routes_async.handle_search_events(q)))
         return json_resp(handle_search_events(q))
 
+    if path == "/facets":
+        filters = dict(
+            concepts=qs.get("concept", []),
+            categories=qs.get("category", []),
+            start=qs.get("start", [None])[0],
+            end=qs.get("end", [None])[0],
+        )
+        try:
+            if ASYNC_CORE:
+                from . import routes_async
+                return json_resp(_run(routes_async.handle_get_facets(**filters)))
+            return json_resp(handle_get_facets(**filters))
+        except ValueError as e:
+            return json_resp({"error": str(e)}, 400)
+
+    if path == "/related":
+        uri = qs.get("uri", [None])[0]
+        if ASYNC_CORE:
+            from . import routes_async
+            body = _run(routes_async.handle_get_related(uri))
+        else:
+            body = handle_get_related(uri)
+        if body is None:
+            return json_resp({"error": "Event not found"}, 404)
+        return json_resp(body)
+
+    if path == "/batch":
+        try:
+            payload = request_json(event)
+            if not isinstance(payload, dict):
+                raise ValueError("body must be a JSON object with 'requests'")
+            if ASYNC_CORE:
+                from . import routes_async
+                return json_resp(_run(routes_async.handle_batch(payload.get("requests"))))
+            return json_resp(handle_batch(payload.get("requests")))
+        except ValueError as e:  # includes malformed JSON
+            return json_resp({"error": str(e)}, 400)
+
+    if path == "/metrics":
+        if ASYNC_CORE:
+            from . import routes_async
+            return json_resp(_run(routes_async.handle_get_metrics()))
+        return json_resp(handle_get_metrics())
+
     return json_resp({"error": "Not found"}, 404)
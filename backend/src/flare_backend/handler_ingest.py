@@ -2,6 +2,7 @@ import os
 import json
 import gzip
 import io
+import time
 import uuid
 import logging
 import datetime
@@ -10,13 +11,21 @@ from urllib.parse import parse_qs
 from .routes import (
     handle_fetch_and_index,
     handle_create_index,
+    handle_migrate_index,
     handle_delete_index,
+    handle_refresh_facets,
+    handle_refresh_related,
 )
+from .restore import restore_days, parse_date, RESTORE_MAX_DAYS
+from .profiling import StageProfiler
 from .util import json_resp
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
+# Stop starting new restore days once this little invocation time is left
+RESTORE_RESERVE_MS = int(os.getenv("RESTORE_RESERVE_MS", "25000"))
+
 QUERY_LIST = [
     line.strip() for line in
     os.getenv("INGEST_QUERIES", "").splitlines()
@@ -47,12 +56,12 @@ def _export_snapshot(items: list) -> dict:
         gz.write((json.dumps(obj, default=str) + "\n").encode("utf-8"))
         count += 1
     gz.close()
-    buf.seek(0)
+    body = buf.getvalue()
 
     s3.put_object(
         Bucket=bucket,
         Key=key,
-        Body=buf.getvalue(),
+        Body=body,
         ContentType="application/json",
         ContentEncoding="gzip",
     )
@@ -68,13 +77,43 @@ def _export_snapshot(items: list) -> dict:
             log.warning(
                 "[snapshot] could not start Glue crawler %s: %s", crawler, e)
 
-    return {"bucket": bucket, "key": key, "count": count}
+    return {"bucket": bucket, "key": key, "count": count, "bytes": len(body)}
+
+
+def _upload_profiles(paths: list) -> list:
+    """cProfile dumps live in the container's /tmp; keep them next to the snapshots."""
+    bucket = os.getenv("SNAPSHOT_BUCKET")
+    if not bucket or not paths:
+        return paths
+    s3 = boto3.client("s3")
+    dt = datetime.datetime.utcnow().strftime("%Y-%m-%d")
+    keys = []
+    for path in paths:
+        key = f"profiles/dt={dt}/{os.path.basename(path)}"
+        s3.upload_file(path, bucket, key)
+        keys.append(f"s3://{bucket}/{key}")
+    return keys
+
+
+def _snapshot_stage(prof, items):
+    with prof.stage("snapshot") as st:
+        snap = _export_snapshot(items)
+        st.items, st.bytes = snap.get("count", 0), snap.get("bytes", 0)
+    return snap
+
 
+def _profile_summary(prof):
+    summary = prof.emit()
+    if "cprofile" in summary:
+        summary["cprofile"] = _upload_profiles(summary["cprofile"])
+    return summary
 
-def _run_scheduled_ingest():
+
+def _run_scheduled_ingest(prof=None):
     """
     Runs all queries from INGEST_QUERIES and returns the list of documents
     that were indexed during this run (so we can snapshot them).
+    Fetch/transform/bulk of every query accumulate on `prof`.
     """
     if not QUERY_LIST:
         return []
@@ -86,35 +125,85 @@ def _run_scheduled_ingest():
         categories = params.get("categories", [None])[0]
         concepts = params.get("concepts", [])
         log.info("Ingest qs=%s", qs)
-        items = handle_fetch_and_index(pages, categories, concepts)
+        items = handle_fetch_and_index(pages, categories, concepts, profiler=prof)
         all_items.extend(items)
     return all_items
 
 
-def lambda_handler(event, _ctx):
+def _restore(qs, ctx):
+    bucket = os.getenv("SNAPSHOT_BUCKET")
+    source = qs.get("source", [f"s3://{bucket}" if bucket else None])[0]
+    start = qs.get("start", [None])[0]
+    if not source or not start:
+        return json_resp({"error": "source and start are required"}, 400)
+    try:
+        start_d = parse_date(start)
+        end_d = parse_date(qs.get("end", [start])[0])
+    except ValueError:
+        return json_resp({"error": "start and end must be YYYY-MM-DD"}, 400)
+    if end_d < start_d:
+        return json_resp({"error": "end is before start"}, 400)
+    if (end_d - start_d).days >= RESTORE_MAX_DAYS:
+        return json_resp({"error": f"at most {RESTORE_MAX_DAYS} days per call"}, 400)
+
+    deadline = None
+    if ctx is not None:
+        left_ms = ctx.get_remaining_time_in_millis() - RESTORE_RESERVE_MS
+        deadline = time.monotonic() + max(0, left_ms) / 1000
+    # a non-null `resume` means: call again with start=<resume>
+    return json_resp(restore_days(source, start_d, end_d, deadline=deadline))
+
+
+def lambda_handler(event, ctx):
     """Handles both EventBridge and manual /fetch (dev-stage)."""
     path = event.get("rawPath", "")
     qs = parse_qs(event.get("rawQueryString", ""))
 
     # EventBridge scheduled run: no path, detail-type = Scheduled Event
     if not event.get("rawPath"):
-        items = _run_scheduled_ingest()
-        snap = _export_snapshot(items)
-        return json_resp({"ingested": len(items), "snapshot": snap})
+        prof = StageProfiler("ingest")
+        items = _run_scheduled_ingest(prof)
+        with prof.stage("related") as st:
+            related = handle_refresh_related([ev["uri"] for ev in items])
+            st.items = related.get("updated", 0)
+        facets = None
+        if items:
+            with prof.stage("facets"):
+                facets = handle_refresh_facets()
+        snap = _snapshot_stage(prof, items)
+        return json_resp({
+            "ingested": len(items),
+            "snapshot": snap,
+            "related": related,
+            "facetsUpdatedAt": facets and facets["updatedAt"],
+            "profile": _profile_summary(prof),
+        })
 
     # Manual endpoints (dev)
     if path == "/fetch":
         pages = qs.get("pages", ["1-1"])[0]
         categories = qs.get("categories", [None])[0]
         concepts = qs.get("concepts", [])
-        items = handle_fetch_and_index(pages, categories, concepts)
-        _export_snapshot(items)
+        prof = StageProfiler("fetch")
+        items = handle_fetch_and_index(pages, categories, concepts, profiler=prof)
+        with prof.stage("related") as st:
+            st.items = handle_refresh_related([ev["uri"] for ev in items]).get("updated", 0)
+        with prof.stage("facets"):
+            handle_refresh_facets()
+        _snapshot_stage(prof, items)
+        _profile_summary(prof)
         return json_resp(items)
 
     if path == "/es-index":
         return json_resp(handle_create_index())
 
+    if path == "/migrate-index":
+        return json_resp(handle_migrate_index())
+
     if path == "/delete_index":
         return json_resp(handle_delete_index())
 
+    if path == "/restore":
+        return _restore(qs, ctx)
+
     return json_resp({"error": "Not found"}, 404)
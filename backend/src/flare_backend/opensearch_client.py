@@ -4,16 +4,39 @@ import boto3
 from requests_aws4auth import AWS4Auth
 from opensearchpy import OpenSearch
 from opensearchpy import RequestsHttpConnection
+from opensearchpy import NotFoundError as OSNotFoundError
+from opensearchpy import TransportError as OSTransportError
 from elasticsearch import Elasticsearch
+from elasticsearch import NotFoundError as ESNotFoundError
+from elasticsearch import ApiError as ESApiError
+from elasticsearch import TransportError as ESTransportError
 from .config import Settings
 
 log = logging.getLogger(__name__)
 region = os.getenv("AWS_REGION", "us-east-1")
 
+# Either client may be in use depending on the stage
+NOT_FOUND_ERRORS = (ESNotFoundError, OSNotFoundError)
+# Any error response or connection failure from either client
+SEARCH_ERRORS = (ESApiError, ESTransportError, OSTransportError)
+
+
+def _embedded():
+    global _embedded_store
+    if _embedded_store is None:
+        from .embedded_search import EmbeddedSearch
+        log.info("[OS] Embedded SQLite search at %s", Settings.EMBEDDED_SEARCH_PATH)
+        _embedded_store = EmbeddedSearch(Settings.EMBEDDED_SEARCH_PATH)
+    return _embedded_store
+
 
 def get_client():
+    # ─── in-process (SQLite FTS5, no server) ───────────────
+    if Settings.SEARCH_BACKEND == "embedded":
+        return _embedded()
+
     # ─── local dev (Docker) ────────────────────────────────
-    if Settings.LOCAL:
+    if Settings.SEARCH_BACKEND == "elasticsearch":
         log.info("[OS] Local Elasticsearch client")
         return Elasticsearch(Settings.OPENSEARCH_ENDPOINT, verify_certs=False, request_timeout=30)
 
@@ -34,4 +57,100 @@ def get_client():
     )
 
 
+def get_async_client():
+    """
+    Async twin of `get_client` for the ASGI app / async Lambda core.
+    Created lazily (the HTTP session binds to the running event loop) and
+    shared by every request in the process, so the connection pool is reused.
+    """
+    global _async_es
+    if _async_es is not None:
+        return _async_es
+
+    # ─── in-process (SQLite FTS5, no server) ───────────────
+    if Settings.SEARCH_BACKEND == "embedded":
+        from .embedded_search import AsyncEmbeddedSearch
+        _async_es = AsyncEmbeddedSearch(_embedded())
+        return _async_es
+
+    # ─── local dev (Docker) ────────────────────────────────
+    if Settings.SEARCH_BACKEND == "elasticsearch":
+        from elasticsearch import AsyncElasticsearch
+        log.info("[OS] Local async Elasticsearch client")
+        _async_es = AsyncElasticsearch(
+            Settings.OPENSEARCH_ENDPOINT, verify_certs=False, request_timeout=30,
+            connections_per_node=Settings.ASYNC_POOL_SIZE)
+        return _async_es
+
+    # ─── Lambda / prod (OpenSearch + SigV4) ────────────────
+    from opensearchpy import AsyncOpenSearch, AsyncHttpConnection, AWSV4SignerAsyncAuth
+    creds = boto3.Session().get_credentials()
+    log.info("[OS] Async OpenSearch client with SigV4")
+    _async_es = AsyncOpenSearch(
+        Settings.OPENSEARCH_ENDPOINT,
+        http_auth=AWSV4SignerAsyncAuth(creds, region, "es"),
+        verify_certs=True,
+        connection_class=AsyncHttpConnection,
+        maxsize=Settings.ASYNC_POOL_SIZE,
+        timeout=30,
+        max_retries=3,
+        retry_on_timeout=True,
+    )
+    return _async_es
+
+
+# ─── point-in-time (API differs between Elasticsearch and OpenSearch) ──────
+
+def open_pit(client, index, keep_alive):
+    if hasattr(client, "open_point_in_time"):
+        return client.open_point_in_time(index=index, keep_alive=keep_alive)["id"]
+    return client.create_point_in_time(index=index, keep_alive=keep_alive)["pit_id"]
+
+
+async def open_pit_async(client, index, keep_alive):
+    if hasattr(client, "open_point_in_time"):
+        return (await client.open_point_in_time(index=index, keep_alive=keep_alive))["id"]
+    return (await client.create_point_in_time(index=index, keep_alive=keep_alive))["pit_id"]
+
+
+def try_open_pit(client, index, keep_alive):
+    """`open_pit`, or None if the cluster refuses (e.g. too many open PITs)."""
+    try:
+        return open_pit(client, index, keep_alive)
+    except SEARCH_ERRORS as e:
+        log.warning("[OS] could not open a PIT; paging without one: %s", e)
+        return None
+
+
+async def try_open_pit_async(client, index, keep_alive):
+    try:
+        return await open_pit_async(client, index, keep_alive)
+    except SEARCH_ERRORS as e:
+        log.warning("[OS] could not open a PIT; paging without one: %s", e)
+        return None
+
+
+def close_pit(client, pit_id):
+    """Free a PIT now instead of holding its segments until keep_alive runs out."""
+    try:
+        if hasattr(client, "close_point_in_time"):
+            client.close_point_in_time(id=pit_id)
+        else:
+            client.delete_point_in_time(body={"pit_id": [pit_id]})
+    except SEARCH_ERRORS as e:
+        log.info("[OS] could not close PIT (it expires anyway): %s", e)
+
+
+async def close_pit_async(client, pit_id):
+    try:
+        if hasattr(client, "close_point_in_time"):
+            await client.close_point_in_time(id=pit_id)
+        else:
+            await client.delete_point_in_time(body={"pit_id": [pit_id]})
+    except SEARCH_ERRORS as e:
+        log.info("[OS] could not close PIT (it expires anyway): %s", e)
+
+
+_embedded_store = None
 es = get_client()
+_async_es = None
@@ -0,0 +1,172 @@
+"""
+Per-stage instrumentation for ingest runs.
+
+    prof = StageProfiler("ingest")
+    with prof.stage("fetch") as st:
+        events = fetch_events(...)
+        st.items = len(events)
+    prof.emit()            # one JSON log line
+    body["profile"] = prof.summary()
+
+Each stage records wall time, items/s, bytes (when the caller knows them
+without extra work) and peak RSS, sampled from /proc every PROFILE_SAMPLE_MS on a background
+thread. A stage that runs several times (one fetch per ingest query)
+accumulates. Optional:
+
+  PROFILE_TRACEMALLOC=1  also report the peak Python heap per stage (slower)
+  PROFILE_BYTES=1        also count the JSON size of fetched events and bulk
+                         docs (`add_bytes`), serialized after the stage's timer
+  PROFILE_CPROFILE=1     write a cProfile dump per stage to PROFILE_DIR
+                         (calling thread only; bulk worker threads are not seen)
+"""
+import os
+import sys
+import json
+import time
+import logging
+import cProfile
+import resource
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+PROFILE_CPROFILE = os.getenv("PROFILE_CPROFILE", "") == "1"
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "") == "1"
+PROFILE_BYTES = os.getenv("PROFILE_BYTES", "") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/flare-profiles")
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", "20"))
+
+_MB = 1024 * 1024
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes():
+    """Current resident set size, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss_bytes():
+    """Process-lifetime peak RSS (what the Lambda memory limit is checked against)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RssSampler(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            rss = rss_bytes()
+            if rss is not None and rss > (self.peak or 0):
+                self.peak = rss
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        rss = rss_bytes()
+        if rss is not None and rss > (self.peak or 0):
+            self.peak = rss
+        return self.peak
+
+
+class Stage:
+    """Handed to the `with` block; the caller fills in what it knows."""
+
+    def __init__(self):
+        self.items = 0
+        self.bytes = 0
+
+
+class StageProfiler:
+    def __init__(self, name, cprofile=None, trace_heap=None, count_bytes=None):
+        self.name = name
+        self.cprofile = PROFILE_CPROFILE if cprofile is None else cprofile
+        self.trace_heap = PROFILE_TRACEMALLOC if trace_heap is None else trace_heap
+        self.count_bytes = PROFILE_BYTES if count_bytes is None else count_bytes
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.dumps = []
+
+    @contextmanager
+    def stage(self, name):
+        st = Stage()
+        sampler = _RssSampler(PROFILE_SAMPLE_MS / 1000)
+        sampler.start()
+        if self.trace_heap:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        prof = cProfile.Profile() if self.cprofile else None
+        if prof:
+            prof.enable()
+        t0 = time.perf_counter()
+        try:
+            yield st
+        finally:
+            wall = time.perf_counter() - t0
+            if prof:
+                prof.disable()
+                self.dumps.append(self._dump(prof, name))
+            heap_peak = tracemalloc.get_traced_memory()[1] if self.trace_heap else None
+            self._record(name, wall, st, sampler.stop(), heap_peak)
+
+    def add_bytes(self, name, obj):
+        """
+        Add the JSON size of `obj` to the finished stage `name`. Serializing is
+        not free, so it only happens with count_bytes and never inside a stage.
+        """
+        if self.count_bytes and name in self.stages:
+            self.stages[name]["bytes"] += len(json.dumps(obj, default=str).encode("utf-8"))
+
+    def _dump(self, prof, stage):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        ts = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        path = os.path.join(PROFILE_DIR, f"{self.name}-{stage}-{ts}-{len(self.dumps)}.prof")
+        prof.dump_stats(path)
+        return path
+
+    def _record(self, name, wall, st, rss_peak, heap_peak):
+        s = self.stages.setdefault(name, {
+            "calls": 0, "wall_s": 0.0, "items": 0, "bytes": 0,
+            "peak_rss_mb": None, "peak_heap_mb": None,
+        })
+        s["calls"] += 1
+        s["wall_s"] += wall
+        s["items"] += st.items or 0
+        s["bytes"] += st.bytes or 0
+        for key, value in (("peak_rss_mb", rss_peak), ("peak_heap_mb", heap_peak)):
+            if value is not None:
+                s[key] = max(s[key] or 0, round(value / _MB, 1))
+
+    def summary(self):
+        stages = {}
+        for name, s in self.stages.items():
+            stages[name] = dict(
+                s,
+                wall_s=round(s["wall_s"], 3),
+                items_per_s=round(s["items"] / s["wall_s"], 1) if s["wall_s"] else None,
+            )
+        out = {
+            "name": self.name,
+            "wall_s": round(time.perf_counter() - self.started, 3),
+            "max_rss_mb": round(max_rss_bytes() / _MB, 1),
+            "stages": stages,
+        }
+        if self.dumps:
+            out["cprofile"] = self.dumps
+        return out
+
+    def emit(self):
+        summary = self.summary()
+        log.info(json.dumps({"profile": summary}))
+        return summary
@@ -0,0 +1,207 @@
+"""
+Ingest-time "more like this": precomputed related events.
+
+For every event touched by an ingest we score the other events of the last
+30 days by concept overlap (score-weighted Jaccard over concept URIs) and
+text similarity (TF-IDF cosine over title + summary), and store the top K as
+a compact `related` list on the document. Serving `/related` is then a single
+`get`. Existing events are only rewritten when a new event enters their top K.
+"""
+import os
+import re
+import math
+import logging
+from collections import Counter, defaultdict
+
+from opensearchpy.helpers import bulk
+
+log = logging.getLogger(__name__)
+
+RELATED_K = int(os.getenv("RELATED_K", "10"))
+RELATED_MIN_SCORE = float(os.getenv("RELATED_MIN_SCORE", "0.05"))
+RELATED_CONCEPT_WEIGHT = float(os.getenv("RELATED_CONCEPT_WEIGHT", "0.6"))
+RELATED_WINDOW = os.getenv("RELATED_WINDOW", "now-30d/d")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]{3,}")
+_STOPWORDS = frozenset(
+    "the and for with that this from are was were has have had its into over "
+    "after amid about more than their they them will would could been being "
+    "said says new also which while what when where who how not but".split())
+# Candidate generation: a doc's top tokens and concepts, skipping ones shared by
+# more than _MAX_DF of the window (e.g. "Climate change"), keeping the
+# _MAX_CANDIDATES docs that share the most of them.
+_CANDIDATE_TOKENS = 15
+_MAX_DF = 0.2
+_MAX_CANDIDATES = 200
+
+_SOURCE = ["uri", "title.eng", "summary.eng", "images", "eventDate",
+           "concepts.uri", "concepts.score", "related"]
+
+
+def _tokens(doc):
+    text = " ".join(filter(None, [
+        (doc.get("title") or {}).get("eng"),
+        (doc.get("summary") or {}).get("eng"),
+    ])).lower()
+    return [t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS]
+
+
+def _concepts(doc):
+    out = {}
+    for c in doc.get("concepts") or []:
+        if c.get("uri"):
+            out[c["uri"]] = float(c.get("score") or 0)
+    return out
+
+
+def load_window(es, index="events"):
+    """All events in the related window, paged with search_after on `uri`."""
+    docs, after = {}, None
+    while True:
+        body = {
+            "_source": _SOURCE,
+            "query": {"range": {"eventDate": {"gte": RELATED_WINDOW}}},
+            "sort": [{"uri": "asc"}],
+            "size": 1000,
+            "track_total_hits": False,
+        }
+        if after:
+            body["search_after"] = after
+        hits = es.search(index=index, body=body)["hits"]["hits"]
+        for h in hits:
+            docs[h["_source"]["uri"]] = h["_source"]
+        if len(hits) < body["size"]:
+            return docs
+        after = hits[-1]["sort"]
+
+
+class RelatedIndex:
+    """In-memory vectors and postings for one window of events."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.concepts = {u: _concepts(d) for u, d in docs.items()}
+        self.concept_mass = {u: sum(cs.values()) for u, cs in self.concepts.items()}
+        tfs = {u: Counter(_tokens(d)) for u, d in docs.items()}
+
+        df = Counter()
+        for tf in tfs.values():
+            df.update(tf.keys())
+        n = max(1, len(docs))
+        self.idf = {t: math.log((n + 1) / (c + 1)) + 1 for t, c in df.items()}
+
+        self.vectors, self.norms = {}, {}
+        for u, tf in tfs.items():
+            vec = {t: (1 + math.log(c)) * self.idf[t] for t, c in tf.items()}
+            self.vectors[u] = vec
+            self.norms[u] = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+
+        max_df = max(2, int(_MAX_DF * n))
+        self.by_concept = defaultdict(set)
+        for u, cs in self.concepts.items():
+            for c in cs:
+                self.by_concept[c].add(u)
+        self.by_concept = {c: us for c, us in self.by_concept.items() if len(us) <= max_df}
+        self.by_token = defaultdict(set)
+        for u, vec in self.vectors.items():
+            for t in self._top_tokens(u):
+                if df[t] <= max_df:
+                    self.by_token[t].add(u)
+
+    def _top_tokens(self, uri):
+        vec = self.vectors[uri]
+        return sorted(vec, key=vec.get, reverse=True)[:_CANDIDATE_TOKENS]
+
+    def candidates(self, uri):
+        shared = Counter()
+        for c in self.concepts[uri]:
+            shared.update(self.by_concept.get(c, ()))
+        for t in self._top_tokens(uri):
+            shared.update(self.by_token.get(t, ()))
+        shared.pop(uri, None)
+        return [u for u, _ in shared.most_common(_MAX_CANDIDATES)]
+
+    def score(self, a, b):
+        # Both terms only depend on what a and b share, and candidates share
+        # little: intersect the keys first (in C) and sum over those.
+        # Weighted Jaccard: sum(max) = |a| + |b| - sum(min).
+        ca, cb = self.concepts[a], self.concepts[b]
+        num = sum(min(ca[k], cb[k]) for k in ca.keys() & cb.keys())
+        den = self.concept_mass[a] + self.concept_mass[b] - num
+        concept_sim = num / den if den > 0 else 0.0
+
+        va, vb = self.vectors[a], self.vectors[b]
+        dot = sum(va[t] * vb[t] for t in va.keys() & vb.keys())
+        text_sim = dot / (self.norms[a] * self.norms[b])
+
+        return (RELATED_CONCEPT_WEIGHT * concept_sim
+                + (1 - RELATED_CONCEPT_WEIGHT) * text_sim)
+
+    def entry(self, uri, score):
+        d = self.docs[uri]
+        return {
+            "uri": uri,
+            "title": (d.get("title") or {}).get("eng"),
+            "image": (d.get("images") or [None])[0],
+            "eventDate": d.get("eventDate"),
+            "score": round(score, 4),
+        }
+
+    def top_k(self, uri, k=RELATED_K):
+        scored = [(self.score(uri, other), other) for other in self.candidates(uri)]
+        scored = [s for s in scored if s[0] >= RELATED_MIN_SCORE]
+        scored.sort(reverse=True)
+        return [self.entry(other, s) for s, other in scored[:k]]
+
+
+def _merge(current, new_entries, k=RELATED_K):
+    """Existing related list with fresher/better entries merged in, or None if unchanged."""
+    merged = {e["uri"]: e for e in current or []}
+    changed = False
+    for e in new_entries:
+        old = merged.get(e["uri"])
+        if old is None or old != e:
+            merged[e["uri"]] = e
+            changed = True
+    if not changed:
+        return None
+    top = sorted(merged.values(), key=lambda e: e["score"], reverse=True)[:k]
+    return top if top != (current or []) else None
+
+
+def update_related(es, new_uris, index="events"):
+    """
+    Recompute `related` for `new_uris` and push them into the lists of
+    existing events whose top K they now belong to. Returns counters.
+    """
+    new_uris = set(new_uris or ())
+    if not new_uris:
+        return {"window": 0, "updated": 0}
+
+    es.indices.refresh(index=index)
+    docs = load_window(es, index)
+    idx = RelatedIndex(docs)
+
+    updates = {}
+    incoming = defaultdict(list)  # existing uri -> new events that scored against it
+    for uri in new_uris & docs.keys():
+        top = idx.top_k(uri)
+        updates[uri] = top
+        for e in top:
+            if e["uri"] not in new_uris:
+                incoming[e["uri"]].append(idx.entry(uri, e["score"]))
+
+    for uri, entries in incoming.items():
+        merged = _merge(docs[uri].get("related"), entries)
+        if merged is not None:
+            updates[uri] = merged
+
+    actions = [
+        {"_op_type": "update", "_index": index, "_id": uri, "doc": {"related": rel}}
+        for uri, rel in updates.items()
+    ]
+    if actions:
+        bulk(es, actions, chunk_size=500)
+    log.info("[related] window=%d new=%d updated=%d",
+             len(docs), len(new_uris), len(actions))
+    return {"window": len(docs), "updated": len(actions)}
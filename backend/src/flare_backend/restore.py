@@ -0,0 +1,230 @@
+"""
+Bootstrap the `events` index from stored ingest snapshots.
+
+Snapshots are the gzip NDJSON files written by `handler_ingest._export_snapshot`
+under `snapshots/dt=YYYY-MM-DD/fetch-<ts>-<id>.json.gz`. The same layout works
+from S3 (`s3://bucket[/prefix]`) or from a local copy (`aws s3 sync`).
+
+    cd ./backend/src
+    python3 -m flare_backend.restore --start 2025-01-01 --end 2025-01-31 \
+        --source s3://my-snapshots-bucket
+"""
+import os
+import re
+import io
+import json
+import gzip
+import time
+import logging
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from opensearchpy.helpers import bulk, parallel_bulk
+
+from .opensearch_client import es
+from .concepts import split_concepts, concept_actions
+from .routes import handle_create_index, handle_refresh_facets, handle_refresh_related
+
+log = logging.getLogger(__name__)
+
+INDEX = "events"
+DEFAULT_PREFIX = "snapshots/"
+RESTORE_WORKERS = int(os.getenv("RESTORE_WORKERS", "8"))
+RESTORE_CHUNK_SIZE = int(os.getenv("RESTORE_CHUNK_SIZE", "500"))
+# Longest range one /restore call accepts; it is still loaded a day at a time
+RESTORE_MAX_DAYS = int(os.getenv("RESTORE_MAX_DAYS", "31"))
+
+_PARTITION_RE = re.compile(r"dt=(\d{4}-\d{2}-\d{2})/")
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _partition_date(key: str):
+    m = _PARTITION_RE.search(key)
+    return parse_date(m.group(1)) if m else None
+
+
+def _list_snapshots(source: str, start, end) -> list:
+    """
+    Return snapshot locations in [start, end] sorted oldest -> newest.
+    Keys sort chronologically because both `dt=` and the `fetch-<ts>` name
+    are zero-padded UTC timestamps.
+    """
+    found = []
+    if source.startswith("s3://"):
+        bucket, _, prefix = source[len("s3://"):].partition("/")
+        prefix = prefix or DEFAULT_PREFIX
+        if not prefix.endswith("/"):
+            prefix += "/"
+        s3 = boto3.client("s3")
+        pages = s3.get_paginator("list_objects_v2").paginate(
+            Bucket=bucket, Prefix=prefix)
+        for page in pages:
+            for obj in page.get("Contents", []):
+                key = obj["Key"]
+                day = _partition_date(key)
+                if key.endswith(".json.gz") and day and start <= day <= end:
+                    found.append(f"s3://{bucket}/{key}")
+    else:
+        root = source
+        if os.path.isdir(os.path.join(root, DEFAULT_PREFIX)):
+            root = os.path.join(root, DEFAULT_PREFIX)
+        for dirpath, _dirs, files in os.walk(root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                day = _partition_date(path.replace(os.sep, "/") + "/")
+                if name.endswith(".json.gz") and day and start <= day <= end:
+                    found.append(path)
+
+    found.sort(key=lambda loc: loc.replace(os.sep, "/").rsplit("dt=", 1)[-1])
+    return found
+
+
+def _read_snapshot(location: str) -> list:
+    if location.startswith("s3://"):
+        bucket, _, key = location[len("s3://"):].partition("/")
+        raw = boto3.client("s3").get_object(
+            Bucket=bucket, Key=key)["Body"].read()
+    else:
+        with open(location, "rb") as f:
+            raw = f.read()
+
+    docs = []
+    with gzip.GzipFile(fileobj=io.BytesIO(raw)) as gz:
+        for line in gz:
+            line = line.strip()
+            if line:
+                docs.append(json.loads(line))
+    return docs
+
+
+def load_snapshots(source: str, start, end, workers: int = RESTORE_WORKERS) -> dict:
+    """
+    Decompress all snapshots in the range in parallel and deduplicate by
+    `uri`, keeping the copy from the newest snapshot.
+    """
+    locations = _list_snapshots(source, start, end)
+    log.info("[restore] %d snapshot files in %s..%s", len(locations), start, end)
+
+    latest = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # map() yields in submission order (oldest first), so later
+        # snapshots overwrite earlier copies of the same event.
+        for docs in pool.map(_read_snapshot, locations):
+            for doc in docs:
+                uri = doc.get("uri")
+                if uri:
+                    latest[uri] = doc
+    return {"files": len(locations), "docs": latest}
+
+
+def restore_snapshots(source: str, start, end, workers: int = RESTORE_WORKERS,
+                      chunk_size: int = RESTORE_CHUNK_SIZE, refresh_derived: bool = True,
+                      restored: set = None) -> dict:
+    """
+    Bulk-load a date range of snapshots straight into the `events` index.
+    With refresh_derived=False, related lists and facets are left to the
+    caller; URIs indexed are added to `restored` when one is given.
+    """
+    loaded = load_snapshots(source, start, end, workers)
+    docs = loaded["docs"]
+
+    handle_create_index()
+    # snapshots hold full events; index concept refs + one doc per concept
+    events, concepts = {}, {}
+    for uri, doc in docs.items():
+        events[uri], ev_concepts = split_concepts(doc)
+        concepts.update(ev_concepts)
+    if concepts:
+        bulk(es, concept_actions(concepts), chunk_size=chunk_size)
+
+    # Skip refreshes while loading; restored afterwards.
+    es.indices.put_settings(index=INDEX, body={
+        "index": {"refresh_interval": "-1"}})
+
+    indexed, errors = 0, 0
+    try:
+        actions = (
+            {"_index": INDEX, "_id": uri, "_source": doc}
+            for uri, doc in events.items()
+        )
+        for ok, info in parallel_bulk(es, actions, thread_count=max(1, workers),
+                                      chunk_size=chunk_size,
+                                      raise_on_error=False):
+            if ok:
+                indexed += 1
+                if restored is not None:
+                    restored.add(info["index"]["_id"])
+            else:
+                errors += 1
+                log.warning("[restore] bulk error: %s", info)
+    finally:
+        es.indices.put_settings(index=INDEX, body={
+            "index": {"refresh_interval": None}})
+        es.indices.refresh(index=INDEX)
+
+    if indexed and refresh_derived:
+        handle_refresh_related(docs.keys())
+        handle_refresh_facets()
+    log.info("[restore] indexed %d docs and %d concepts from %d files (%d errors)",
+             indexed, len(concepts), loaded["files"], errors)
+    return {"files": loaded["files"], "indexed": indexed,
+            "concepts": len(concepts), "errors": errors}
+
+
+def restore_days(source: str, start, end, deadline=None, **kwargs) -> dict:
+    """
+    Restore [start, end] one day at a time, so only one day of snapshots is in
+    memory. Stops before a day starts past `deadline` (time.monotonic()) and
+    returns `resume`: the first day not restored, to pass back as `start`.
+    Related lists and facets are rebuilt once, for everything restored.
+    `indexed` counts distinct events; one seen on several days counts once.
+    """
+    totals = {"days": 0, "files": 0, "concepts": 0, "errors": 0}
+    restored = set()
+    day, resume = start, None
+    while day <= end:
+        if deadline is not None and totals["days"] and time.monotonic() >= deadline:
+            resume = day
+            break
+        result = restore_snapshots(source, day, day, refresh_derived=False,
+                                   restored=restored, **kwargs)
+        for key in ("files", "concepts", "errors"):
+            totals[key] += result[key]
+        totals["days"] += 1
+        day += datetime.timedelta(days=1)
+    if restored:
+        handle_refresh_related(restored)
+        handle_refresh_facets()
+    return dict(totals, indexed=len(restored), resume=resume and resume.isoformat())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Restore the events index from ingest snapshots.")
+    parser.add_argument("--source", default=os.getenv("SNAPSHOT_BUCKET") and
+                        f"s3://{os.getenv('SNAPSHOT_BUCKET')}",
+                        help="s3://bucket[/prefix] or a local directory")
+    parser.add_argument("--start", required=True, help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--end", help="YYYY-MM-DD (inclusive, default: start)")
+    parser.add_argument("--workers", type=int, default=RESTORE_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=RESTORE_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if not args.source:
+        parser.error("--source is required when SNAPSHOT_BUCKET is not set")
+
+    start = parse_date(args.start)
+    end = parse_date(args.end) if args.end else start
+    result = restore_days(args.source, start, end,
+                          workers=args.workers, chunk_size=args.chunk_size)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
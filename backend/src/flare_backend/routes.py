@@ -1,15 +1,35 @@
 from flask import jsonify, request    # used only by Flask version
-from .opensearch_client import es
+from .opensearch_client import es, try_open_pit, close_pit, NOT_FOUND_ERRORS
 from .services import (
     build_search_query,
+    build_facets_query,
     fetch_events,
     extract_and_prepare_event_data,
     event_mapping,
+    event_mapping_additions,
+    MIGRATION_PENDING,
+    MIGRATION_SCRIPT,
+    meta_mapping,
+    concept_mapping,
 )
+from .concepts import (
+    CONCEPTS_INDEX,
+    ConceptCache,
+    split_concepts,
+    concept_actions,
+    fetch_concepts,
+)
+from .singleflight import SingleFlight
+from .admission import AdmissionController, ADMISSION_SEARCH_MAX
+from .related import update_related
+from .profiling import StageProfiler
+from .config import Settings
 from opensearchpy.helpers import bulk
 import base64
+import datetime
 import json
 import logging
+import os
 
 log = logging.getLogger(__name__)
 
@@ -25,138 +45,597 @@ FIELDS = [
     "totalArticleCount",
     "categories.label",
     "categories.wgt",
+    "concepts.uri",
+    "concepts.score",
+    # only present on events indexed before the concept store
     "concepts.label.eng",
     "concepts.type",
     "concepts.location.lat",
     "concepts.location.long",
-    "concepts.score",
     "location.label.eng",
     "location.lat",
     "location.long",
     "infoArticle.eng.url"
 ]
 
+# format=ndjson: documents per internal page, and max documents per stream
+STREAM_PAGE_SIZE = int(os.getenv("STREAM_PAGE_SIZE", "200"))
+STREAM_MAX_DOCS = int(os.getenv("STREAM_MAX_DOCS", "5000"))
+
+# /batch: max sub-requests per call, and of those, max fuzzy searches.
+# A batch holds one search slot, so more searches than the search cap would
+# let one client run past it.
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_MAX_SEARCHES = int(os.getenv("BATCH_MAX_SEARCHES", str(ADMISSION_SEARCH_MAX)))
+
+# Side index holding derived data written at ingest time
+META_INDEX = "flare-meta"
+FACETS_SIZE = int(os.getenv("FACETS_SIZE", "20"))
+
+# How long an idle feed cursor stays valid between page requests
+PIT_KEEP_ALIVE = os.getenv("PIT_KEEP_ALIVE", "2m")
+
+# Identical concurrent feed/search queries share one OpenSearch call
+inflight = SingleFlight()
+# Caps concurrent OpenSearch calls per class; only coalescing leaders pass here
+admission = AdmissionController()
+# Concept labels/locations for expanding the `{uri, score}` refs on events
+concept_cache = ConceptCache()
+
 # ---------- Shared handlers ---------- #
 
 
-def _encode_cursor(sort_values) -> str:
+def _encode_cursor(sort_values, pit_id=None) -> str:
+    payload = {"pit": pit_id, "after": sort_values} if pit_id else sort_values
     try:
         return base64.urlsafe_b64encode(
-            json.dumps(sort_values).encode("utf-8")
+            json.dumps(payload).encode("utf-8")
         ).decode("ascii")
     except Exception:
         return ""
 
 
 def _decode_cursor(token: str):
-    return json.loads(
+    """Returns (pit_id, search_after). Pre-PIT cursors are a bare sort list."""
+    payload = json.loads(
         base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
     )
+    if isinstance(payload, dict):
+        return payload.get("pit"), payload.get("after")
+    return None, payload
 
 
-def handle_get_articles(limit=None, after=None):
-    """
-    When `limit` is not provided -> legacy behavior (return array of top 1000).
-    When `limit` is provided -> return { items: [...], next: <cursor or null> }.
-    Cursor encodes the OpenSearch `sort` values via base64(JSON).
+FEED_SORT = [
+    {"socialScore": {"order": "desc"}},
+    {"eventDate": {"order": "desc"}},  # stable tie-breaker
+]
+
+
+def build_articles_query(limit=None, after=None):
     """
-    # If called from Flask without explicit args, read from request.args
-    if limit is None:
-        try:
-            limit = request.args.get("limit")
-            after = request.args.get("after")
-        except Exception:
-            pass
+    Returns (body, limit_i, pit_id). `limit_i` is None in legacy mode;
+    `pit_id` is the point-in-time carried by the cursor, if any.
+    Shared by the sync handlers below and the async core.
 
-    # ----- Legacy behavior: no limit -> return array of top 1000 -----
+    FEED_SORT matches the index sort (see `event_mapping`), and with
+    total hits untracked OpenSearch can stop after `size` docs per shard.
+    """
+    # ----- Legacy behavior: no limit -> top 1000 -----
     if not limit:
-        result = es.search(index="events", body={
+        return {
             "_source": FIELDS,
             "query": {"match_all": {}},
-            "sort": [
-                {"socialScore": {"order": "desc"}},
-                {"eventDate": {"order": "desc"}},  # stable tie-breaker
-            ],
-            "size": 1000
-        })
-        return [hit["_source"] for hit in result["hits"]["hits"]]
+            "sort": FEED_SORT,
+            "size": 1000,
+            "track_total_hits": False,
+        }, None, None
 
     # ----- Cursor mode -----
     limit_i = max(1, min(int(limit), 1000))
     body = {
         "_source": FIELDS,
         "query": {"match_all": {}},
-        "sort": [
-            {"socialScore": {"order": "desc"}},
-            {"eventDate": {"order": "desc"}},
-        ],
+        "sort": FEED_SORT,
         "size": limit_i,
+        "track_total_hits": False,
     }
 
+    pit_id = None
     if after:
         try:
-            decoded = json.loads(
-                base64.urlsafe_b64decode(after.encode("ascii")).decode("utf-8")
-            )
-            body["search_after"] = decoded
+            pit_id, search_after = _decode_cursor(after)
+            if search_after:
+                body["search_after"] = search_after
         except Exception:
             # bad cursor -> ignore and start from beginning
-            pass
+            pit_id = None
+    return body, limit_i, pit_id
+
+
+def with_pit(body, pit_id):
+    # PIT searches must not name an index; the PIT already pins it.
+    return dict(body, pit={"id": pit_id, "keep_alive": PIT_KEEP_ALIVE})
+
+
+def _search_feed(body, limit_i, pit_id, cls="feed"):
+    """
+    (result, size actually sent): a degraded admission shrinks the page, so
+    a short page only means "last page" when compared against that size.
+    """
+    with admission.admit(cls) as ticket:
+        body = ticket.shrink(body)
+        return _search_paged(body, limit_i, pit_id), body.get("size")
+
+
+def is_last_page(result, body):
+    return len(result["hits"]["hits"]) < body["size"]
+
+
+def _search_paged(body, limit_i, pit_id):
+    """
+    The first page is a plain search; a PIT is only opened when the client
+    asks for page 2, and closed again once a short (last) page is served.
+    If no PIT can be opened the scroll continues on plain search_after.
+    """
+    if limit_i is None or "search_after" not in body:
+        # legacy mode, or a first page that may well be the only one
+        return es.search(index="events", body=body)
+    if pit_id:
+        try:
+            result = es.search(body=with_pit(body, pit_id))
+        except NOT_FOUND_ERRORS:
+            # PIT expired -> continue from the same sort values on a fresh one
+            log.info("[articles] cursor PIT expired; reopening")
+        else:
+            if is_last_page(result, body):
+                close_pit(es, result.get("pit_id", pit_id))
+            return result
+    pit_id = try_open_pit(es, "events", PIT_KEEP_ALIVE)
+    if pit_id is None:
+        return es.search(index="events", body=body)
+    result = es.search(body=with_pit(body, pit_id))
+    if is_last_page(result, body):
+        close_pit(es, result.get("pit_id", pit_id))
+    return result
 
-    result = es.search(index="events", body=body)
+
+def hit_sources(result):
+    return [hit["_source"] for hit in result["hits"]["hits"]]
+
+
+def load_concepts(sources):
+    """
+    Fetch the concepts referenced by `sources` that are not cached yet.
+    Returns the cache snapshot to expand this page from.
+    """
+    docs, missing = concept_cache.missing(sources)
+    if missing:
+        with admission.admit("feed"):
+            concept_cache.add(fetch_concepts(es, missing), missing, docs)
+    return docs
+
+
+def articles_response(result, limit_i, docs):
+    """`docs`: the concept snapshot from `load_concepts` for this page."""
     hits = result["hits"]["hits"]
+    if limit_i is None:
+        return concept_cache.expand(hit_sources(result), docs)
 
     next_token = None
     if len(hits) == limit_i:
         sort_values = hits[-1].get("sort")
         if sort_values is not None:
-            next_token = base64.urlsafe_b64encode(
-                json.dumps(sort_values).encode("utf-8")
-            ).decode("ascii")
+            next_token = _encode_cursor(sort_values, result.get("pit_id"))
 
-    items = [h["_source"] for h in hits]
-    return {"items": items, "next": next_token}
+    return {"items": concept_cache.expand(hit_sources(result), docs), "next": next_token}
 
 
-def handle_search_events(query: str):
-    search_body = build_search_query(query)
+def normalize_query(query: str) -> str:
+    # Analyzers lowercase and split on whitespace anyway, so these variants
+    # are the same search and can share one in-flight call.
+    return " ".join((query or "").split()).lower()
+
+
+def query_key(body) -> str:
+    return json.dumps(body, sort_keys=True, separators=(",", ":"))
+
+
+def build_events_search(query: str):
+    search_body = build_search_query(normalize_query(query))
     search_body["_source"] = FIELDS
-    result = es.search(index="events", body=search_body)
-    return [hit["_source"] for hit in result["hits"]["hits"]]
+    return search_body
 
 
-def handle_fetch_and_index(pages, categories, concepts):
-    start_page, end_page = map(int, pages.split("-"))
-    if not es.indices.exists(index="events"):
-        es.indices.create(index="events", ignore=400)
+def search_response(result, docs):
+    return concept_cache.expand(hit_sources(result), docs)
+
+
+def handle_get_articles(limit=None, after=None):
+    """
+    When `limit` is not provided -> legacy behavior (return array of top 1000).
+    When `limit` is provided -> return { items: [...], next: <cursor or null> }.
+    Cursor encodes the `sort` values (plus, from page 2 on, a point-in-time
+    id) via base64(JSON), so deeper pages stay consistent while an ingest
+    lands mid-scroll.
+    """
+    # If called from Flask without explicit args, read from request.args
+    if limit is None:
+        try:
+            limit = request.args.get("limit")
+            after = request.args.get("after")
+        except Exception:
+            pass
+
+    body, limit_i, pit_id = build_articles_query(limit, after)
+    result, size = inflight.do("articles", query_key([body, pit_id]),
+                               lambda: _search_feed(body, limit_i, pit_id))
+    docs = load_concepts(hit_sources(result))
+    return articles_response(result, limit_i and size, docs)
+
+
+def handle_search_events(query: str):
+    body = build_events_search(query)
+
+    def run():
+        with admission.admit("search") as ticket:
+            return es.search(index="events", body=ticket.shrink(body))
+
+    result = inflight.do("search", query_key(body), run)
+    docs = load_concepts(hit_sources(result))
+    return search_response(result, docs)
+
 
-    events = fetch_events(categories, concepts, start_page, end_page)
-    processed = extract_and_prepare_event_data(events)
+def stream_plan(body, limit, default):
+    """Total docs to stream, and the page body used for the first request."""
+    total = max(1, min(int(limit), STREAM_MAX_DOCS)) if limit else default
+    return total, dict(body, size=min(STREAM_PAGE_SIZE, total))
 
-    bulk_list = []
-    uris_seen = set()
-    for ev in processed:
-        uri = ev["uri"]
-        if uri in uris_seen:
+
+def iter_pages(body, total, pit_id=None, cls="feed"):
+    """
+    Yield up to `total` hits as `STREAM_PAGE_SIZE` pages of sources over
+    search_after, so only one page is ever held in memory. Each page is
+    admitted separately. A PIT is only opened once a second page is needed
+    (see `_search_paged`) and is closed when the stream ends, however it ends.
+    """
+    sent = 0
+    try:
+        while sent < total:
+            page = dict(body, size=min(STREAM_PAGE_SIZE, total - sent))
+            result, size = _search_feed(page, page["size"], pit_id, cls)
+            hits = result["hits"]["hits"]
+            last = len(hits) < size
+            # _search_paged already closed the PIT of a last page
+            pit_id = None if last else result.get("pit_id") or pit_id
+            yield hit_sources(result)
+            sent += len(hits)
+            if last or hits[-1].get("sort") is None:
+                return
+            body = dict(body, search_after=hits[-1]["sort"])
+    finally:
+        if pit_id:
+            close_pit(es, pit_id)
+
+
+def iter_articles(limit=None, after=None):
+    """format=ndjson feed: `limit` is the total to stream (default 1000)."""
+    body, _, pit_id = build_articles_query(STREAM_PAGE_SIZE, after)
+    total, body = stream_plan(body, limit, 1000)
+    for sources in iter_pages(body, total, pit_id):
+        docs = load_concepts(sources)
+        yield from concept_cache.expand(sources, docs)
+
+
+def iter_search_events(query: str, limit=None):
+    """format=ndjson search: `limit` is the total to stream (default 100)."""
+    body = build_events_search(query)
+    total, body = stream_plan(body, limit, body["size"])
+    for sources in iter_pages(body, total, cls="search"):
+        docs = load_concepts(sources)
+        yield from concept_cache.expand(sources, docs)
+
+
+def parse_batch(subrequests):
+    """
+    Validate /batch sub-requests. Each is either
+      {"type": "articles", "limit": ..., "after": ...} or
+      {"type": "search", "query": ...}.
+    Returns one plan entry per sub-request; invalid ones carry an `error`
+    and are answered without touching OpenSearch.
+    """
+    if not isinstance(subrequests, list):
+        raise ValueError("'requests' must be a list")
+    if len(subrequests) > BATCH_MAX_REQUESTS:
+        raise ValueError(f"at most {BATCH_MAX_REQUESTS} requests per batch")
+    if sum(isinstance(s, dict) and s.get("type") == "search" for s in subrequests) > BATCH_MAX_SEARCHES:
+        raise ValueError(f"at most {BATCH_MAX_SEARCHES} searches per batch")
+
+    plan = []
+    for sub in subrequests:
+        kind = sub.get("type") if isinstance(sub, dict) else None
+        try:
+            if kind == "articles":
+                body, limit_i, pit_id = build_articles_query(
+                    sub.get("limit"), sub.get("after"))
+                plan.append({"type": kind, "body": body,
+                             "limit_i": limit_i, "pit_id": pit_id})
+            elif kind == "search":
+                plan.append({"type": kind,
+                             "body": build_events_search(str(sub.get("query", "*")))})
+            else:
+                plan.append({"error": f"unknown type: {kind!r}", "status": 400})
+        except (TypeError, ValueError) as e:
+            plan.append({"error": str(e), "status": 400})
+    return plan
+
+
+def batch_needs_pit(plan):
+    # later feed pages without a PIT of their own share one opened for the batch
+    return any(p.get("limit_i") and not p["pit_id"] and "search_after" in p["body"]
+               for p in plan)
+
+
+def msearch_lines(plan, shared_pit=None):
+    # first feed pages run without a PIT, like GET /articles
+    searches = []
+    for p in plan:
+        if "error" in p:
             continue
-        uris_seen.add(uri)
-        bulk_list.append({"_index": "events", "_id": uri, "_source": ev})
+        if p["type"] == "articles" and p["limit_i"] and "search_after" in p["body"]:
+            pit_id = p["pit_id"] or shared_pit
+            if pit_id:
+                p["pit_id"] = pit_id
+                searches += [{}, with_pit(p["body"], pit_id)]
+                continue
+        searches += [{"index": "events"}, p["body"]]
+    return searches
+
+
+def batch_expired(plan, responses):
+    """
+    (response index, entry) for feed pages whose PIT had expired. Their
+    `pit_id` is dropped so `msearch_lines` reruns them on a fresh one.
+    """
+    live = [p for p in plan if "error" not in p]
+    expired = [(i, p) for i, p in enumerate(live)
+               if p.get("pit_id") and responses[i].get("status") == 404]
+    for _, p in expired:
+        p["pit_id"] = None
+    return expired
+
+
+def batch_pits_to_close(plan, responses, opened):
+    """
+    PITs no returned cursor points at: the ones behind last pages or errors,
+    plus any the batch opened that no entry ended up using.
+    """
+    live = [p for p in plan if "error" not in p]
+    used, kept = set(opened), set()
+    for p, r in zip(live, responses):
+        if not p.get("pit_id"):
+            continue
+        used.add(p["pit_id"])
+        if "hits" in r:
+            p["pit_id"] = r.get("pit_id", p["pit_id"])
+            if not is_last_page(r, p["body"]):
+                kept.add(p["pit_id"])
+    return used - kept - {None}
+
+
+def shrink_searches(plan, ticket):
+    # a degraded batch runs its searches at the reduced size, like GET /search
+    for p in plan:
+        if p.get("type") == "search":
+            p["body"] = ticket.shrink(p["body"])
+
+
+def batch_sources(responses):
+    return [src for r in responses if "hits" in r for src in hit_sources(r)]
+
+
+def batch_response(plan, responses, docs):
+    out, it = [], iter(responses)
+    for p in plan:
+        if "error" in p:
+            out.append({"status": p["status"], "error": p["error"]})
+            continue
+        sub = next(it)
+        if "error" in sub:
+            err = sub["error"]
+            out.append({"status": sub.get("status", 500),
+                        "error": err.get("reason", err) if isinstance(err, dict) else err})
+        elif p["type"] == "articles":
+            if p.get("pit_id"):
+                sub.setdefault("pit_id", p["pit_id"])
+            out.append({"status": 200, "body": articles_response(sub, p["limit_i"], docs)})
+        else:
+            out.append({"status": 200, "body": search_response(sub, docs)})
+    return {"responses": out}
+
+
+def handle_batch(subrequests):
+    """Run feed pages and searches as one `_msearch` round trip."""
+    plan = parse_batch(subrequests)
+    with admission.admit("search") as ticket:
+        shrink_searches(plan, ticket)
+        opened = [try_open_pit(es, "events", PIT_KEEP_ALIVE)] if batch_needs_pit(plan) else []
+        searches = msearch_lines(plan, opened and opened[0])
+        responses = es.msearch(body=searches)["responses"] if searches else []
+        expired = batch_expired(plan, responses)
+        if expired:
+            log.info("[batch] %d cursor PITs expired; reopening", len(expired))
+            retry = [p for _, p in expired]
+            opened.append(try_open_pit(es, "events", PIT_KEEP_ALIVE))
+            retried = es.msearch(body=msearch_lines(retry, opened[-1]))["responses"]
+            for (i, _), r in zip(expired, retried):
+                responses[i] = r
+        for pit_id in batch_pits_to_close(plan, responses, opened):
+            close_pit(es, pit_id)
+    docs = load_concepts(batch_sources(responses))
+    return batch_response(plan, responses, docs)
+
+
+def facets_response(result):
+    aggs = result["aggregations"]
+    total = result["hits"]["total"]
+    return {
+        "total": total["value"] if isinstance(total, dict) else total,
+        "concepts": [{"label": b["key"], "count": b["doc_count"]}
+                     for b in aggs["concepts"]["buckets"]],
+        "categories": [{"label": b["key"], "count": b["doc_count"]}
+                       for b in aggs["categories"]["buckets"]],
+        "sentiment": [{"from": round(b["key"], 2), "count": b["doc_count"]}
+                      for b in aggs["sentiment"]["buckets"]],
+        "eventDate": [{"date": b["key_as_string"], "count": b["doc_count"]}
+                      for b in aggs["eventDate"]["buckets"]],
+    }
+
+
+def _compute_facets(**filters):
+    body = build_facets_query(size=FACETS_SIZE, **filters)
+
+    def run():
+        with admission.admit("search"):
+            return es.search(index="events", body=body)
+
+    return facets_response(inflight.do("facets", query_key(body), run))
+
+
+def handle_refresh_facets():
+    """Precompute the unfiltered facets; run at the end of each ingest."""
+    facets = _compute_facets()
+    if not es.indices.exists(index=META_INDEX):
+        es.indices.create(index=META_INDEX, body=meta_mapping)
+    now = datetime.datetime.utcnow().isoformat() + "Z"
+    es.index(index=META_INDEX, id="facets", body={"updatedAt": now, "data": facets})
+    return dict(facets, updatedAt=now)
+
+
+def facet_filters(concepts=None, categories=None, start=None, end=None):
+    """/facets filters; a bad date raises ValueError (-> 400) before it reaches the cluster."""
+    for name, value in (("start", start), ("end", end)):
+        if value:
+            try:
+                datetime.datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"{name} must be YYYY-MM-DD") from None
+    return dict(concepts=concepts, categories=categories, start=start, end=end)
+
+
+def handle_get_facets(concepts=None, categories=None, start=None, end=None):
+    """
+    Unfiltered -> the document stored by the last ingest (a single get).
+    Filtered (or nothing stored yet) -> aggregations at request time.
+    """
+    filters = facet_filters(concepts, categories, start, end)
+    if not any(filters.values()):
+        try:
+            with admission.admit("feed"):
+                doc = es.get(index=META_INDEX, id="facets")["_source"]
+            return dict(doc["data"], updatedAt=doc["updatedAt"], precomputed=True)
+        except NOT_FOUND_ERRORS:
+            log.info("[facets] nothing precomputed yet; aggregating live")
+    return dict(_compute_facets(**filters), precomputed=False)
+
+
+def handle_get_related(uri):
+    """Related events precomputed at ingest: one `get`, no similarity query."""
+    if not uri:
+        return None
+    try:
+        with admission.admit("feed"):
+            doc = es.get(index="events", id=uri, _source_includes=["related"])
+    except NOT_FOUND_ERRORS:
+        return None
+    return {"uri": uri, "related": doc["_source"].get("related", [])}
+
+
+def handle_refresh_related(uris):
+    return update_related(es, uris)
+
+
+def handle_get_metrics():
+    return {
+        "singleflight": inflight.stats.snapshot(),
+        "admission": admission.snapshot(),
+        "concepts": {"cached": len(concept_cache)},
+    }
+
+
+def handle_fetch_and_index(pages, categories, concepts, profiler=None):
+    """
+    Fetch, transform and bulk-index one EventRegistry query. Stages are timed
+    on `profiler`; without one the summary is only logged.
+    """
+    prof = profiler or StageProfiler("fetch_and_index")
+    start_page, end_page = map(int, pages.split("-"))
+    # create with the mapping (and index sort) rather than dynamic defaults
+    handle_create_index()
+
+    with prof.stage("fetch") as st:
+        events = fetch_events(categories, concepts, start_page, end_page)
+        st.items = len(events)
+    prof.add_bytes("fetch", events)
+
+    with prof.stage("transform") as st:
+        processed = extract_and_prepare_event_data(events)
+        items = {}
+        for ev in processed:
+            items.setdefault(ev["uri"], ev)
+
+        bulk_list, concept_docs = [], {}
+        for uri, ev in items.items():
+            doc, ev_concepts = split_concepts(ev)
+            concept_docs.update(ev_concepts)
+            bulk_list.append({"_index": "events", "_id": uri, "_source": doc})
+        st.items = len(processed)
 
     if bulk_list:
-        bulk(es, bulk_list)
-    return [b["_source"] for b in bulk_list]
+        with prof.stage("bulk") as st:
+            actions = [*concept_actions(concept_docs), *bulk_list]
+            st.items = len(actions)
+            bulk(es, actions)
+            concept_cache.add(concept_docs)
+        prof.add_bytes("bulk", [a["_source"] for a in actions])
+
+    if profiler is None:
+        prof.emit()
+    # full events (concepts inlined) for the response and the snapshot
+    return list(items.values())
 
 
 def handle_create_index():
+    if not es.indices.exists(index=CONCEPTS_INDEX):
+        es.indices.create(index=CONCEPTS_INDEX, body=concept_mapping)
     if not es.indices.exists(index="events"):
         es.indices.create(index="events", body=event_mapping)
         return {"message": "Index 'events' created"}
     return {"message": "Index already exists"}
 
 
+def handle_migrate_index():
+    """
+    Bring an existing `events` index up to the current mapping without
+    recreating it: put_mapping adds the missing fields, then a background
+    update_by_query fills `conceptLabels` on old events and reindexes the
+    docs that lack them. Safe to rerun.
+    """
+    if Settings.SEARCH_BACKEND == "embedded":
+        return {"message": "embedded indices always use the current mapping"}
+    es.indices.put_mapping(index="events", body=event_mapping_additions)
+    task = es.update_by_query(index="events",
+                              body={"query": MIGRATION_PENDING, "script": MIGRATION_SCRIPT},
+                              conflicts="proceed", wait_for_completion=False)
+    log.info("[migrate] mapping updated; backfill task %s", task.get("task"))
+    return {"message": "Mapping updated; backfill running", "task": task.get("task")}
+
+
 def handle_delete_index():
     index = "events"
     if es.indices.exists(index=index):
         es.indices.delete(index=index)
+        # the stored facets describe the deleted events
+        if es.indices.exists(index=META_INDEX):
+            es.indices.delete(index=META_INDEX)
         return {"message": f"Index '{index}' deleted"}
     return {"message": "Index not found"}
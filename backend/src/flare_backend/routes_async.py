@@ -0,0 +1,248 @@
+"""
+Async core: same handlers as `routes`, backed by the async OpenSearch client.
+Query bodies and response shapes come from `routes` so both paths stay in sync.
+Used by `app_asgi` and (with ASYNC_CORE=1) by `handler_api`.
+"""
+import asyncio
+import logging
+
+from .opensearch_client import (
+    get_async_client,
+    try_open_pit_async,
+    close_pit_async,
+    NOT_FOUND_ERRORS,
+)
+from .routes import (
+    build_articles_query,
+    with_pit,
+    is_last_page,
+    PIT_KEEP_ALIVE,
+    hit_sources,
+    concept_cache,
+    articles_response,
+    build_events_search,
+    search_response,
+    query_key,
+    stream_plan,
+    parse_batch,
+    batch_needs_pit,
+    msearch_lines,
+    batch_expired,
+    batch_pits_to_close,
+    shrink_searches,
+    batch_sources,
+    batch_response,
+    build_facets_query,
+    facet_filters,
+    facets_response,
+    META_INDEX,
+    FACETS_SIZE,
+    STREAM_PAGE_SIZE,
+    handle_fetch_and_index as _sync_fetch_and_index,
+    handle_migrate_index as _sync_migrate_index,
+)
+from .services import event_mapping, concept_mapping
+from .concepts import CONCEPTS_INDEX, fetch_concepts_async
+from .singleflight import AsyncSingleFlight
+from .admission import AsyncAdmissionController
+
+log = logging.getLogger(__name__)
+
+inflight = AsyncSingleFlight()
+admission = AsyncAdmissionController()
+
+# ---------- Shared async handlers ---------- #
+
+
+async def load_concepts(sources):
+    # async twin of routes.load_concepts; fills the same process-wide cache
+    docs, missing = concept_cache.missing(sources)
+    if missing:
+        async with admission.admit("feed"):
+            found = await fetch_concepts_async(get_async_client(), missing)
+        concept_cache.add(found, missing, docs)
+    return docs
+
+
+async def _search_feed(body, limit_i, pit_id, cls="feed"):
+    # (result, size actually sent), see routes._search_feed
+    async with admission.admit(cls) as ticket:
+        body = ticket.shrink(body)
+        return await _search_paged(body, limit_i, pit_id), body.get("size")
+
+
+async def _search_paged(body, limit_i, pit_id):
+    # see routes._search_paged: PIT opened lazily on page 2, closed on the last page
+    es = get_async_client()
+    if limit_i is None or "search_after" not in body:
+        return await es.search(index="events", body=body)
+    if pit_id:
+        try:
+            result = await es.search(body=with_pit(body, pit_id))
+        except NOT_FOUND_ERRORS:
+            log.info("[articles] cursor PIT expired; reopening")
+        else:
+            if is_last_page(result, body):
+                await close_pit_async(es, result.get("pit_id", pit_id))
+            return result
+    pit_id = await try_open_pit_async(es, "events", PIT_KEEP_ALIVE)
+    if pit_id is None:
+        return await es.search(index="events", body=body)
+    result = await es.search(body=with_pit(body, pit_id))
+    if is_last_page(result, body):
+        await close_pit_async(es, result.get("pit_id", pit_id))
+    return result
+
+
+async def handle_get_articles(limit=None, after=None):
+    body, limit_i, pit_id = build_articles_query(limit, after)
+    result, size = await inflight.do("articles", query_key([body, pit_id]),
+                                     lambda: _search_feed(body, limit_i, pit_id))
+    docs = await load_concepts(hit_sources(result))
+    return articles_response(result, limit_i and size, docs)
+
+
+async def handle_search_events(query: str):
+    body = build_events_search(query)
+
+    async def run():
+        async with admission.admit("search") as ticket:
+            return await get_async_client().search(index="events", body=ticket.shrink(body))
+
+    result = await inflight.do("search", query_key(body), run)
+    docs = await load_concepts(hit_sources(result))
+    return search_response(result, docs)
+
+
+async def aiter_pages(body, total, pit_id=None, cls="feed"):
+    # async twin of routes.iter_pages
+    sent = 0
+    try:
+        while sent < total:
+            page = dict(body, size=min(STREAM_PAGE_SIZE, total - sent))
+            result, size = await _search_feed(page, page["size"], pit_id, cls)
+            hits = result["hits"]["hits"]
+            last = len(hits) < size
+            pit_id = None if last else result.get("pit_id") or pit_id
+            yield hit_sources(result)
+            sent += len(hits)
+            if last or hits[-1].get("sort") is None:
+                return
+            body = dict(body, search_after=hits[-1]["sort"])
+    finally:
+        if pit_id:
+            await close_pit_async(get_async_client(), pit_id)
+
+
+async def iter_articles(limit=None, after=None):
+    body, _, pit_id = build_articles_query(STREAM_PAGE_SIZE, after)
+    total, body = stream_plan(body, limit, 1000)
+    async for sources in aiter_pages(body, total, pit_id):
+        docs = await load_concepts(sources)
+        for src in concept_cache.expand(sources, docs):
+            yield src
+
+
+async def iter_search_events(query: str, limit=None):
+    body = build_events_search(query)
+    total, body = stream_plan(body, limit, body["size"])
+    async for sources in aiter_pages(body, total, cls="search"):
+        docs = await load_concepts(sources)
+        for src in concept_cache.expand(sources, docs):
+            yield src
+
+
+async def handle_batch(subrequests):
+    es = get_async_client()
+    plan = parse_batch(subrequests)
+    async with admission.admit("search") as ticket:
+        shrink_searches(plan, ticket)
+        opened = ([await try_open_pit_async(es, "events", PIT_KEEP_ALIVE)]
+                  if batch_needs_pit(plan) else [])
+        searches = msearch_lines(plan, opened and opened[0])
+        responses = (await es.msearch(body=searches))["responses"] if searches else []
+        expired = batch_expired(plan, responses)
+        if expired:
+            log.info("[batch] %d cursor PITs expired; reopening", len(expired))
+            retry = [p for _, p in expired]
+            opened.append(await try_open_pit_async(es, "events", PIT_KEEP_ALIVE))
+            retried = (await es.msearch(body=msearch_lines(retry, opened[-1])))["responses"]
+            for (i, _), r in zip(expired, retried):
+                responses[i] = r
+        for pit_id in batch_pits_to_close(plan, responses, opened):
+            await close_pit_async(es, pit_id)
+    docs = await load_concepts(batch_sources(responses))
+    return batch_response(plan, responses, docs)
+
+
+async def _compute_facets(**filters):
+    body = build_facets_query(size=FACETS_SIZE, **filters)
+
+    async def run():
+        async with admission.admit("search"):
+            return await get_async_client().search(index="events", body=body)
+
+    return facets_response(await inflight.do("facets", query_key(body), run))
+
+
+async def handle_get_facets(concepts=None, categories=None, start=None, end=None):
+    filters = facet_filters(concepts, categories, start, end)
+    if not any(filters.values()):
+        try:
+            async with admission.admit("feed"):
+                doc = (await get_async_client().get(index=META_INDEX, id="facets"))["_source"]
+            return dict(doc["data"], updatedAt=doc["updatedAt"], precomputed=True)
+        except NOT_FOUND_ERRORS:
+            log.info("[facets] nothing precomputed yet; aggregating live")
+    return dict(await _compute_facets(**filters), precomputed=False)
+
+
+async def handle_get_related(uri):
+    if not uri:
+        return None
+    try:
+        async with admission.admit("feed"):
+            doc = await get_async_client().get(
+                index="events", id=uri, _source_includes=["related"])
+    except NOT_FOUND_ERRORS:
+        return None
+    return {"uri": uri, "related": doc["_source"].get("related", [])}
+
+
+async def handle_get_metrics():
+    return {
+        "singleflight": inflight.stats.snapshot(),
+        "admission": admission.snapshot(),
+        "concepts": {"cached": len(concept_cache)},
+    }
+
+
+async def handle_fetch_and_index(pages, categories, concepts):
+    # EventRegistry SDK is blocking; keep it off the event loop.
+    return await asyncio.to_thread(_sync_fetch_and_index, pages, categories, concepts)
+
+
+async def handle_create_index():
+    es = get_async_client()
+    if not await es.indices.exists(index=CONCEPTS_INDEX):
+        await es.indices.create(index=CONCEPTS_INDEX, body=concept_mapping)
+    if not await es.indices.exists(index="events"):
+        await es.indices.create(index="events", body=event_mapping)
+        return {"message": "Index 'events' created"}
+    return {"message": "Index already exists"}
+
+
+async def handle_migrate_index():
+    # rare admin call; reuse the sync path off the event loop
+    return await asyncio.to_thread(_sync_migrate_index)
+
+
+async def handle_delete_index():
+    es = get_async_client()
+    index = "events"
+    if await es.indices.exists(index=index):
+        await es.indices.delete(index=index)
+        if await es.indices.exists(index=META_INDEX):
+            await es.indices.delete(index=META_INDEX)
+        return {"message": f"Index '{index}' deleted"}
+    return {"message": "Index not found"}
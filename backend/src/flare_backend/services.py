@@ -128,7 +128,7 @@ def build_search_query(query):
                                         },
                                         {
                                             "match": {
-                                                "concepts.label.eng": {
+                                                "conceptLabels": {
                                                     "query": query,
                                                     "boost": 2,
                                                     "fuzziness": "AUTO"
@@ -154,7 +154,7 @@ def build_search_query(query):
                                     "fields": [
                                         "title.eng^4",
                                         "summary.eng^2",
-                                        "concepts.label.eng^3"
+                                        "conceptLabels^3"
                                     ],
                                     "slop": 2
                                 }
@@ -194,38 +194,80 @@ def build_search_query(query):
     }
 
 
-# Define Elasticsearch mapping
-event_mapping = {
+FACET_FIELDS = {
+    "concepts": "conceptLabels.keyword",
+    "categories": "categories.label.keyword",
+}
+
+
+def build_facets_query(concepts=None, categories=None, start=None, end=None, size=20):
+    """
+    Aggregation-only query for /facets: top concepts, top categories,
+    a sentiment histogram and a per-day eventDate histogram.
+    Filters are exact labels (any-of within a list) and an eventDate range.
+    """
+    filters = []
+    if concepts:
+        filters.append({"terms": {FACET_FIELDS["concepts"]: list(concepts)}})
+    if categories:
+        filters.append({"terms": {FACET_FIELDS["categories"]: list(categories)}})
+    if start or end:
+        rng = {}
+        if start:
+            rng["gte"] = start
+        if end:
+            rng["lte"] = end
+        filters.append({"range": {"eventDate": rng}})
+
+    return {
+        "size": 0,
+        "track_total_hits": True,
+        "query": {"bool": {"filter": filters}} if filters else {"match_all": {}},
+        "aggs": {
+            "concepts": {"terms": {"field": FACET_FIELDS["concepts"], "size": size}},
+            "categories": {"terms": {"field": FACET_FIELDS["categories"], "size": size}},
+            "sentiment": {"histogram": {
+                "field": "sentiment",
+                "interval": 0.2,
+                "extended_bounds": {"min": -1, "max": 1},
+            }},
+            "eventDate": {"date_histogram": {
+                "field": "eventDate",
+                "calendar_interval": "day",
+                "format": "yyyy-MM-dd",
+                "min_doc_count": 0,
+            }},
+        },
+    }
+
+
+# Small side index for derived data (precomputed facets, ...)
+meta_mapping = {
+    "mappings": {
+        "dynamic": False,
+        "properties": {
+            "updatedAt": {"type": "date"},
+            "data": {"type": "object", "enabled": False},
+        }
+    }
+}
+
+
+# One document per concept URI (see concepts.py)
+concept_mapping = {
     "mappings": {
         "properties": {
             "uri": {"type": "keyword"},
-            "totalArticleCount": {"type": "integer"},
-            "articleCounts": {
+            "type": {"type": "keyword"},
+            "label": {
                 "properties": {
-                    "eng": {"type": "integer"}
+                    "eng": {"type": "text"}
                 }
             },
-            "concepts": {
+            "location": {
                 "properties": {
-                    "type": {"type": "keyword"},
-                    "label": {
-                        "properties": {
-                            "eng": {"type": "text"}
-                        }
-                    },
-                    "location": {
+                    "country": {
                         "properties": {
-                            "country": {
-                                "properties": {
-                                    "label": {
-                                        "properties": {
-                                            "eng": {"type": "text"}
-                                        }
-                                    },
-                                    "lat": {"type": "float"},
-                                    "long": {"type": "float"}
-                                }
-                            },
                             "label": {
                                 "properties": {
                                     "eng": {"type": "text"}
@@ -234,13 +276,62 @@ event_mapping = {
                             "lat": {"type": "float"},
                             "long": {"type": "float"}
                         }
-                    }
+                    },
+                    "label": {
+                        "properties": {
+                            "eng": {"type": "text"}
+                        }
+                    },
+                    "lat": {"type": "float"},
+                    "long": {"type": "float"}
+                }
+            }
+        }
+    }
+}
+
+
+# Define Elasticsearch mapping
+# Index sort matches the /articles feed order so feed queries can terminate
+# early. It can only be set at creation: recreate the index (or restore it
+# from snapshots) to apply it to an existing cluster.
+event_mapping = {
+    "settings": {
+        "index": {
+            "sort.field": ["socialScore", "eventDate"],
+            "sort.order": ["desc", "desc"],
+            "sort.missing": ["_last", "_last"],
+        }
+    },
+    "mappings": {
+        "properties": {
+            "uri": {"type": "keyword"},
+            "totalArticleCount": {"type": "integer"},
+            "articleCounts": {
+                "properties": {
+                    "eng": {"type": "integer"}
                 }
             },
+            # refs only; labels and locations live in the `concepts` index
+            "concepts": {
+                "properties": {
+                    "uri": {"type": "keyword"},
+                    "score": {"type": "integer"}
+                }
+            },
+            # flat concept labels for search and facets
+            "conceptLabels": {
+                "type": "text",
+                "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}
+            },
             "categories": {
                 "properties": {
                     "uri": {"type": "keyword"},
-                    "label": {"type": "text"}
+                    "label": {
+                        "type": "text",
+                        "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}
+                    },
+                    "wgt": {"type": "integer"}
                 }
             },
             "title": {
@@ -288,7 +379,57 @@ event_mapping = {
                         }
                     }
                 }
-            }
+            },
+            # precomputed at ingest (see related.py); stored, never searched
+            "related": {"type": "object", "enabled": False}
         }
     }
 }
+
+
+# Fields event_mapping gained after the prod `events` index was created.
+# put_mapping can add new fields and multi-fields in place (not change types);
+# MIGRATION_PENDING matches the docs update_by_query still has to reindex.
+event_mapping_additions = {
+    "properties": {
+        "conceptLabels": event_mapping["mappings"]["properties"]["conceptLabels"],
+        "categories": {
+            "properties": {
+                "label": {
+                    "type": "text",
+                    "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}
+                }
+            }
+        },
+        # must be in place before the first ingest writes `related`, or dynamic
+        # mapping indexes every entry (and `enabled` can't be changed afterwards)
+        "related": event_mapping["mappings"]["properties"]["related"],
+    }
+}
+
+MIGRATION_PENDING = {
+    "bool": {
+        "should": [
+            {"bool": {"must_not": [{"exists": {"field": "conceptLabels"}}]}},
+            {"bool": {"must_not": [{"exists": {"field": "categories.label.keyword"}}]}},
+        ],
+        "minimum_should_match": 1,
+    }
+}
+
+# Events indexed before the concept store carry full concepts inline; give
+# them the flat `conceptLabels` list that search and facets now run against.
+MIGRATION_SCRIPT = {
+    "lang": "painless",
+    "source": """
+        if (ctx._source.conceptLabels == null) {
+            List labels = new ArrayList();
+            if (ctx._source.concepts != null) {
+                for (def c : ctx._source.concepts) {
+                    if (c.label != null && c.label.eng != null) { labels.add(c.label.eng); }
+                }
+            }
+            ctx._source.conceptLabels = labels;
+        }
+    """,
+}
@@ -0,0 +1,110 @@
+"""
+Request coalescing ("single-flight") for identical in-flight queries.
+
+Concurrent callers with the same key wait on one call and share its result,
+so a burst of identical `/articles` or `/search` requests costs one
+OpenSearch query. Results are shared objects: callers must not mutate them.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {"executed": 0, "coalesced": 0})
+
+    def record(self, kind, coalesced):
+        with self._lock:
+            self._counts[kind]["coalesced" if coalesced else "executed"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            out = {}
+            for kind, c in self._counts.items():
+                total = c["executed"] + c["coalesced"]
+                out[kind] = dict(c, ratio=round(c["coalesced"] / total, 4) if total else 0.0)
+            return out
+
+
+class SingleFlight:
+    """Thread-safe coalescing for the sync handlers (threaded Flask, Lambda)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = _Stats()
+
+    def do(self, kind, key, fn):
+        with self._lock:
+            call = self._calls.get((kind, key))
+            leader = call is None
+            if leader:
+                call = self._calls[(kind, key)] = _Call()
+        self.stats.record(kind, coalesced=not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop((kind, key), None)
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Same contract as `SingleFlight` for coroutines on one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+        self.stats = _Stats()
+
+    async def do(self, kind, key, fn):
+        fut = self._calls.get((kind, key))
+        self.stats.record(kind, coalesced=fut is not None)
+        if fut is not None:
+            try:
+                # shield: a cancelled follower must not cancel the leader's call
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            # the leader was cancelled, not us: run again (one follower leads)
+            return await self.do(kind, key, fn)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._calls[(kind, key)] = fut
+        try:
+            result = await fn()
+            fut.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # followers see a cancelled future and retry without us
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            # mark retrieved so an unobserved error isn't logged at GC
+            fut.exception()
+            raise
+        finally:
+            self._calls.pop((kind, key), None)
@@ -2,14 +2,33 @@ import json
 import os
 import gzip
 import base64
+import zlib
+import itertools
 
 GZIP_THRESHOLD = int(os.getenv("GZIP_THRESHOLD_BYTES", "15000"))  # ~15 KB
 
 
-def json_resp(body, status=200):
-    text = json.dumps(body, default=str)
+def maybe_gzip(text: str):
+    """gzip bytes for `text` if it is large enough to be worth it, else None."""
     if len(text) >= GZIP_THRESHOLD and os.getenv("ENABLE_GZIP", "1") == "1":
-        gz = gzip.compress(text.encode("utf-8"))
+        return gzip.compress(text.encode("utf-8"))
+    return None
+
+
+def request_json(event):
+    """Parsed JSON body of an API Gateway (HTTP API) event, or None."""
+    raw = event.get("body")
+    if not raw:
+        return None
+    if event.get("isBase64Encoded"):
+        raw = base64.b64decode(raw).decode("utf-8")
+    return json.loads(raw)
+
+
+def json_resp(body, status=200, headers=None):
+    text = json.dumps(body, default=str)
+    gz = maybe_gzip(text)
+    if gz is not None:
         return {
             "statusCode": status,
             "isBase64Encoded": True,  # required so API GW won’t mangle the bytes
@@ -17,7 +36,8 @@ def json_resp(body, status=200):
                 "Content-Type": "application/json",
                 "Content-Encoding": "gzip",
                 # expose so browser JS can read it
-                "Access-Control-Expose-Headers": "Content-Encoding, ETag"
+                "Access-Control-Expose-Headers": "Content-Encoding, ETag",
+                **(headers or {}),
             },
             "body": base64.b64encode(gz).decode("ascii"),
         }
@@ -26,7 +46,52 @@ def json_resp(body, status=200):
             "statusCode": status,
             "headers": {
                 "Content-Type": "application/json",
-                "Access-Control-Expose-Headers": "Content-Encoding, ETag"
+                "Access-Control-Expose-Headers": "Content-Encoding, ETag",
+                **(headers or {}),
             },
             "body": text,
         }
+
+
+def overloaded_resp(err):
+    """503 for a request shed by admission control."""
+    return json_resp({"error": str(err)}, 503,
+                     headers={"Retry-After": str(err.retry_after)})
+
+
+def prime(docs):
+    """
+    Advance a lazy stream to its first item so early failures (e.g. a shed
+    request) surface before any response bytes are sent.
+    """
+    it = iter(docs)
+    for first in it:
+        return itertools.chain([first], it)
+    return iter(())
+
+
+def ndjson_lines(docs):
+    """One JSON document per line, produced lazily."""
+    for doc in docs:
+        yield json.dumps(doc, default=str) + "\n"
+
+
+def ndjson_resp(docs, status=200):
+    """
+    Lambda variant of the NDJSON stream. Python Lambdas can't stream the
+    response, so lines are gzip-compressed as they are produced: only the
+    compressed body is ever held, never the full JSON text.
+    """
+    gz = zlib.compressobj(wbits=31)  # 31 -> gzip container
+    chunks = [gz.compress(line.encode("utf-8")) for line in ndjson_lines(docs)]
+    chunks.append(gz.flush())
+    return {
+        "statusCode": status,
+        "isBase64Encoded": True,
+        "headers": {
+            "Content-Type": "application/x-ndjson",
+            "Content-Encoding": "gzip",
+            "Access-Control-Expose-Headers": "Content-Encoding, ETag"
+        },
+        "body": base64.b64encode(b"".join(chunks)).decode("ascii"),
+    }
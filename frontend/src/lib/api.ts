@@ -1,6 +1,7 @@
 import axios from "axios";
 import type { FlareArticle, LatLngLabel } from "@/types/flare";
 import { API_CONFIG } from "@/constants/config";
+import { decodeColumnar, isColumnarPage } from "@/lib/columnar";
 
 // ---- formatters ------------------------------------------------------------
 
@@ -57,14 +58,20 @@ export async function fetchArticlesChunk(
   const { limit = 100, after } = params;
   const url = `${API_CONFIG.BASE_URL}${
     API_CONFIG.ENDPOINTS.ARTICLES
-  }?limit=${limit}${after ? `&after=${encodeURIComponent(after)}` : ""}`;
+  }?limit=${limit}&format=columnar${
+    after ? `&after=${encodeURIComponent(after)}` : ""
+  }`;
 
   const res = await axios.get(url, {
     validateStatus: (s) => s >= 200 && s < 300,
   });
 
-  // Support both legacy (array) and new ({items,next}) for safety
   const payload = res.data;
+  if (isColumnarPage(payload)) {
+    return { items: decodeColumnar(payload), next: payload.next ?? null };
+  }
+
+  // Older APIs ignore `format`: support both legacy (array) and ({items,next})
   const rawItems = Array.isArray(payload) ? payload : payload.items;
   const items: FlareArticle[] = rawItems.map((src: any) =>
     formatArticleFromSource(src)
@@ -79,10 +86,56 @@ export async function fetchArticlesChunk(
 // ---- API wrappers ----------------------------------------------------------
 
 /**
- * Backwards-compatible helper that returns up to `max` (default 1000)
- * and internally uses the chunked endpoint if available.
+ * Streams up to `max` articles from `/articles?format=ndjson`, parsing one
+ * network chunk at a time. Throws if the API does not answer with NDJSON
+ * (older APIs ignore `format` and return a single JSON document).
+ */
+export async function streamArticles(max = 1000): Promise<FlareArticle[]> {
+  const res = await fetch(
+    `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ARTICLES}?format=ndjson&limit=${max}`
+  );
+  if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+  const contentType = res.headers.get("Content-Type") ?? "";
+  if (!contentType.includes("application/x-ndjson")) {
+    await res.body.cancel();
+    throw new Error(`expected NDJSON, got ${contentType || "no content type"}`);
+  }
+
+  const out: FlareArticle[] = [];
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = "";
+
+  const emit = (lines: string[]) => {
+    for (const line of lines) {
+      if (line.trim()) out.push(formatArticleFromSource(JSON.parse(line)));
+    }
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split("\n");
+    buffered = lines.pop() ?? "";
+    emit(lines);
+  }
+  emit([buffered + decoder.decode()]);
+
+  return out;
+}
+
+/**
+ * Backwards-compatible helper that returns up to `max` (default 1000).
+ * Uses the NDJSON stream, falling back to the chunked endpoint.
  */
 export async function fetchArticles(max = 1000): Promise<FlareArticle[]> {
+  try {
+    return await streamArticles(max);
+  } catch {
+    // older API without format=ndjson -> page through the cursor endpoint
+  }
+
   const out: FlareArticle[] = [];
   let cursor: string | null = null;
 
@@ -0,0 +1,95 @@
+import type {
+  FlareArticle,
+  FlareCategory,
+  FlareConcept,
+  LatLngLabel,
+} from "@/types/flare";
+
+/** `/articles?format=columnar` payload (see backend flare_backend/columnar.py). */
+export interface ColumnarPage {
+  format: "columnar";
+  version: number;
+  count: number;
+  next: string | null;
+  strings: string[];
+  uri: string[];
+  title: (string | null)[];
+  summary: (string | null)[];
+  image: (string | null)[];
+  url: (string | null)[];
+  eventDate: number[];
+  sentiment: (number | null)[];
+  socialScore: (number | null)[];
+  wgt: (number | null)[];
+  totalArticleCount: (number | null)[];
+  location: { label: number[]; lat: (number | null)[]; long: (number | null)[] };
+  categories: { offsets: number[]; label: number[]; wgt: (number | null)[] };
+  concepts: { offsets: number[]; ref: number[]; score: (number | null)[] };
+  conceptTable: {
+    label: number[];
+    type: number[];
+    lat: (number | null)[];
+    long: (number | null)[];
+  };
+}
+
+export const isColumnarPage = (payload: any): payload is ColumnarPage =>
+  payload?.format === "columnar";
+
+/** Expand a columnar page into the same FlareArticle[] as formatArticleFromSource. */
+export function decodeColumnar(page: ColumnarPage): FlareArticle[] {
+  const s = (i: number) => (i < 0 ? "" : page.strings[i]);
+  const { location: loc, categories: cat, concepts: con, conceptTable: tbl } = page;
+  const out: FlareArticle[] = new Array(page.count);
+
+  for (let i = 0; i < page.count; i++) {
+    const categories: FlareCategory[] = [];
+    for (let j = cat.offsets[i]; j < cat.offsets[i + 1]; j++) {
+      categories.push({ label: s(cat.label[j]), wgt: cat.wgt[j] ?? 0 });
+    }
+
+    const concepts: FlareConcept[] = [];
+    const locations: LatLngLabel[] = [];
+    for (let j = con.offsets[i]; j < con.offsets[i + 1]; j++) {
+      const row = con.ref[j];
+      const label = s(tbl.label[row]);
+      const type = s(tbl.type[row]);
+      const score = con.score[j] ?? undefined;
+      const lat = tbl.lat[row];
+      const long = tbl.long[row];
+      concepts.push({
+        label: { eng: label },
+        type,
+        score,
+        location: lat == null && long == null ? undefined : { lat: lat ?? undefined, long: long ?? undefined },
+      });
+      if (type === "loc" && (score ?? 0) > 60) {
+        locations.push({ label, latitude: lat ?? 0, longitude: long ?? 0 });
+      }
+    }
+
+    const lat = loc.lat[i];
+    const long = loc.long[i];
+    const url = page.url[i];
+
+    out[i] = {
+      uri: page.uri[i] ?? crypto.randomUUID(),
+      title: page.title[i] ?? "",
+      summary: page.summary[i] ?? "",
+      image: page.image[i] ?? "",
+      sentiment: page.sentiment[i] ?? 0,
+      eventDate: s(page.eventDate[i]),
+      socialScore: page.socialScore[i] ?? 0,
+      wgt: page.wgt[i] ?? 0,
+      categories,
+      concepts,
+      mainLocation:
+        lat && long ? { label: s(loc.label[i]), latitude: lat, longitude: long } : null,
+      locations,
+      infoArticle: url ? { eng: { url } } : undefined,
+      compositeScore: page.wgt[i] ?? 0,
+      totalArticleCount: page.totalArticleCount[i] ?? 0,
+    };
+  }
+  return out;
+}
@@ -14,6 +14,17 @@ ECR_REPO_NAME = "flare-backend"
 
 IMAGE_TAG = os.getenv("IMAGE_TAG", "latest")
 
+# Max concurrent SearchFn containers (/search and /batch). Each Lambda
+# container serves one request at a time, so the in-process admission
+# controller never sees contention; this reservation is the cross-container
+# search cap instead, equal to ADMISSION_SEARCH_MAX (4 = the search thread
+# pool of the single t3.small node). ApiFn (feed, facets, related) stays
+# unreserved so searches can't crowd it out.
+SEARCH_RESERVED_CONCURRENCY = {
+    "dev":  None,   # unreserved: the dev account has little concurrency to spare
+    "prod": 4,
+}
+
 INGEST_QUERIES = {
     "dev":  "",
     "prod": """
@@ -14,7 +14,7 @@ from aws_cdk import (
 )
 
 from constructs import Construct
-from constants import ECR_REPO_NAME, IMAGE_TAG, INGEST_QUERIES
+from constants import ECR_REPO_NAME, IMAGE_TAG, INGEST_QUERIES, SEARCH_RESERVED_CONCURRENCY
 
 
 class FlareApiStack(Stack):
@@ -66,7 +66,8 @@ class FlareApiStack(Stack):
 
         repo = ecr.Repository.from_repository_name(self, "Repo", ECR_REPO_NAME)
 
-        def docker_fn(id_: str, timeout_sec: int, handler: str) -> _lambda.DockerImageFunction:
+        def docker_fn(id_: str, timeout_sec: int, handler: str,
+                      reserved: int = None) -> _lambda.DockerImageFunction:
             return _lambda.DockerImageFunction(
                 self, id_,
                 role=lambda_role,
@@ -78,6 +79,7 @@ class FlareApiStack(Stack):
                 architecture=_lambda.Architecture.ARM_64,
                 memory_size=1024,
                 timeout=Duration.seconds(timeout_sec),
+                reserved_concurrent_executions=reserved,
                 environment={
                     "STAGE": stage,
                     "OPENSEARCH_ENDPOINT": public_endpoint,
@@ -90,6 +92,10 @@ class FlareApiStack(Stack):
 
         api_fn = docker_fn(
             "ApiFn", 30, "flare_backend.handler_api.lambda_handler")
+        # same image and handler; a separate function so only searches are capped
+        search_fn = docker_fn(
+            "SearchFn", 30, "flare_backend.handler_api.lambda_handler",
+            reserved=SEARCH_RESERVED_CONCURRENCY[stage])
         ingest_fn = docker_fn(
             "IngestFn", 60, "flare_backend.handler_ingest.lambda_handler")
 
@@ -102,7 +108,7 @@ class FlareApiStack(Stack):
             enforce_ssl=True,
             removal_policy=RemovalPolicy.RETAIN,
         )
-        snapshots_bucket.grant_write(ingest_fn)
+        snapshots_bucket.grant_read_write(ingest_fn)
 
         ingest_fn.add_environment(
             "SNAPSHOT_BUCKET", snapshots_bucket.bucket_name)
@@ -165,6 +171,8 @@ class FlareApiStack(Stack):
                     "http://localhost:3000",
                 ],
                 allow_methods=[apigw.CorsHttpMethod.ANY],
+                # POST /batch sends JSON, which needs a preflight
+                allow_headers=["Content-Type"],
             ),
         )
         # read routes
@@ -176,10 +184,30 @@ class FlareApiStack(Stack):
         api.add_routes(
             path="/search",
             methods=[apigw.HttpMethod.GET],
-            integration=integ.HttpLambdaIntegration("SearchInt", api_fn),
+            integration=integ.HttpLambdaIntegration("SearchInt", search_fn),
         )
-        # dev-only manual ingest endpoint
+        api.add_routes(
+            path="/facets",
+            methods=[apigw.HttpMethod.GET],
+            integration=integ.HttpLambdaIntegration("FacetsInt", api_fn),
+        )
+        api.add_routes(
+            path="/related",
+            methods=[apigw.HttpMethod.GET],
+            integration=integ.HttpLambdaIntegration("RelatedInt", api_fn),
+        )
+        api.add_routes(
+            path="/batch",
+            methods=[apigw.HttpMethod.POST],
+            integration=integ.HttpLambdaIntegration("BatchInt", search_fn),
+        )
+        # dev-only: process counters and the manual ingest endpoint
         if stage == "dev":
+            api.add_routes(
+                path="/metrics",
+                methods=[apigw.HttpMethod.GET],
+                integration=integ.HttpLambdaIntegration("MetricsInt", api_fn),
+            )
             api.add_routes(
                 path="/fetch",
                 methods=[apigw.HttpMethod.GET],